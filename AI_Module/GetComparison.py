@@ -4,16 +4,15 @@ import sys
 import openai
 import csv
 import re
-from progress_tracking import update_progress
-import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-
-comparison_file = os.path.join(script_dir, "../inputs-outputs/comparison_output.txt")
-best_features_file = os.path.join(script_dir, "../inputs-outputs/best_features.txt")
+sys.path.append(os.path.join(script_dir, "../Shared_Module"))
+from http_client import LLM_DEADLINE, LLM_HEDGE_AFTER, request
+from llm_cache import cached_completion
+from workspace import job_path
 
 def build_comparison_prompt(product_name):
     return f"""
@@ -134,21 +133,26 @@ def call_perplexity(product_name):
     headers = { "Authorization": f"Bearer {os.getenv("PERPLEXITY_API_KEY")}", "Content-Type": "application/json"} # key to hide
     payload = { "model": "sonar", "messages": [{"role": "user", "content": prompt}], "temperature": 0.3} # adjusted temp for precision
 
-    try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
+    def complete():
+        # shared pooled client, retried and bounded by a deadline instead of waiting on perplexity forever
+        response = request("POST", url, deadline=LLM_DEADLINE, hedge_after=LLM_HEDGE_AFTER, headers=headers, data=json.dumps(payload))
         output = response.json()
         return output["choices"][0]["message"]["content"].strip()
 
+    try:
+        # comparisons for the same product come back from the shared llm cache until it expires
+        return cached_completion("perplexity", payload["model"], payload["messages"], {"temperature": payload["temperature"]}, complete)
+
     except Exception as e:
         print(f"Error calling perplexity: {e}")
         return []
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Input product name as the second argument.")
-        sys.exit(1)
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    product = product_name
+    comparison_file = job_path(job_id, "comparison_output.txt")
+    best_features_file = job_path(job_id, "best_features.txt")
 
-    product = sys.argv[1]
     print(f"Requesting comparison data from Perplexity.")
     raw_response = call_perplexity(product)
 
@@ -190,4 +194,11 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Error handling file: {e}")
 
-    update_progress("comparison", 100)
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Input product name as the second argument.")
+        sys.exit(1)
+
+    product = sys.argv[1]
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(product, job_id)
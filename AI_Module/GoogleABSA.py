@@ -1,218 +1,38 @@
 import logging
 import os
-import spacy
 import json
 import re
-import torch
-from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
 import sys
+import threading
+from collections import OrderedDict
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
-nlp = spacy.load("en_core_web_sm")
-
-device = torch.device("mps")
-
-sentiment_model = AutoModelForSequenceClassification.from_pretrained("nlptown/bert-base-multilingual-uncased-sentiment")
-sentiment_tokenizer = AutoTokenizer.from_pretrained("nlptown/bert-base-multilingual-uncased-sentiment")
-sentiment_pipeline = pipeline("sentiment-analysis", model=sentiment_model, tokenizer=sentiment_tokenizer, device=device)
-
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_dir, "../Shared_Module"))
+from aspect_taxonomy import PRICING_TERMS, TECH_ASPECTS, get_matcher
+from inference_cache import content_hash, get_outputs, put_outputs
+from models import SENTIMENT_MODEL, load_sentiment_pipeline, load_spacy, model_version, run_length_bucketed
+from workspace import job_path
+
+# models come from the shared registry so the backend worker pool only loads them once
+nlp = load_spacy()
+sentiment_pipeline = load_sentiment_pipeline()
 
-input_file = os.path.join(script_dir, "../inputs-outputs/processed_dataset.json")
-output_file = os.path.join(script_dir, "../inputs-outputs/analyzed_sentiments.json")
-snippets_log = os.path.join(script_dir, "snippets_log.txt")
+# pipes GoogleABSA never reads, skipped when parsing (dependencies need the tagger and parser)
+UNUSED_PIPES = ["ner", "lemmatizer"]
 
-with open(snippets_log, "w") as f:
-    pass
+# shared taxonomy plus the pricing aspect, compiled once into a single matcher
+aspect_matcher = get_matcher({**TECH_ASPECTS, "pricing": PRICING_TERMS})
 
 sid = SentimentIntensityAnalyzer()
 
-product_name = None
-
-TECH_ASPECTS = {
-    # Display & Screen
-    "display": [
-        "screen", "display", "brightness", "peak brightness", "contrast", "contrast ratio",
-        "resolution", "refresh rate", "color accuracy", "HDR", "glare", "touchscreen",
-        "OLED", "LCD", "Mini LED", "MicroLED", "AMOLED", "viewing angles", "screen size",
-        "pixel density", "aspect ratio", "curved display", "ambient light sensor",
-        "anti-reflective", "blue light filter", "flicker-free", "matte finish", "edge-to-edge",
-        "in-cell touch", "dual display", "3D display", "nit", "nits"
-    ],
-
-    # Performance
-    "performance": [
-        "performance","speed", "lag", "efficiency", "responsiveness", "multitasking", "processing power",
-        "CPU", "GPU", "RAM", "thermal performance", "overheating", "frame rate",
-        "rendering speed", "benchmark scores", "clock speed", "turbo boost", "core count",
-        "hyper-threading", "instruction throughput", "latency", "parallel processing",
-        "system responsiveness", "bottleneck", "real-time performance", "performance mode"
-    ],
-
-    # Battery & Power Management
-    "battery": [
-        "battery", "battery life", "charge time", "power consumption", "fast charging",
-        "wireless charging", "battery drain", "energy efficiency", "wattage", "power adapter",
-        "battery capacity", "battery degradation", "battery cycle count", "removable battery",
-        "charging efficiency", "battery backup", "endurance", "battery health",
-        "charging port", "wired charging", "power brick", "power cable", "quick charge",
-        "lasted", "longer battery", "power-saving mode", "power saver",
-        "battery drain", "battery optimization", "battery longevity", "power backup",
-        "battery endurance", "battery usage", "battery saver feature", "quick battery drain",
-        "long-lasting charge", "overnight battery life", "slow discharge"
-    ],
-
-    # Storage & SSD
-    "storage": [
-        "SSD", "HDD", "storage capacity", "read speed", "write speed", "load times",
-        "expandable storage", "NVMe", "PCIe", "external storage", "SD card",
-        "flash memory", "eMMC", "UFS", "HFS+", "file system performance",
-        "SATA", "RAID configuration", "disk encryption"
-    ],
-
-    # Connectivity & Ports
-    "ports": [
-        "USB", "USB 2.0", "USB 3.0", "USB-C", "Thunderbolt", "HDMI", "Ethernet", "SD card reader",
-        "audio jack", "Wi-Fi", "Bluetooth", "5G", "LTE", "NFC", "Wi-Fi 6", "Wi-Fi 7",
-        "network connectivity", "dongle", "VGA", "DisplayPort", "DVI", "microSD slot", "FireWire",
-        "MHL", "Mini DisplayPort", "SIM card slot", "RJ45 port"
-    ],
-
-    # Keyboard
-    "keyboard": [
-        "key travel", "key feel", "backlit keyboard", "mechanical switches", "RGB lighting",
-        "typing experience", "keyboard layout", "macro keys", "numpad", "scissor switches",
-        "chiclet keys", "water-resistant keyboard", "ergonomic design", "key rollover",
-        "anti-ghosting", "hot-swappable keys", "programmable macros"
-    ],
-
-    # Trackpad & Mouse Input
-    "trackpad": [
-        "touchpad", "trackpad sensitivity", "multi-touch gestures", "palm rejection",
-        "haptic feedback", "scrolling experience", "precision tracking", "force touch",
-        "gesture recognition", "trackpoint"
-    ],
-
-    # Audio & Sound System
-    "audio": [
-        "sound", "speaker", "sound quality", "volume", "bass", "treble", "microphone",
-        "noise cancellation", "Dolby Atmos", "spatial audio", "headphone jack",
-        "bluetooth audio latency", "wireless earbuds support", "audio codec", "sound clarity",
-        "frequency response", "balanced audio", "amplifier", "subwoofer", "stereo separation",
-        "surround sound"
-    ],
-
-    # Design & Build Quality
-    "design": [
-        "design", "build quality", "materials", "aesthetics", "weight", "thickness", "durability",
-        "hinge strength", "bezel", "chassis", "color options", "portability", "carbon fiber",
-        "aluminum body", "plastic chassis", "sleek design", "ergonomic design", "form factor",
-        "curved design", "industrial design", "finish", "texture", "back cover design",
-        "sturdiness", "premium feel", "waterproof rating", "dust resistance"
-    ],
-
-    # Software & User Experience
-    "software": [
-        "software", "operating system", "pre-installed apps", "UI", "UX", "bloatware", "customization",
-        "dark mode", "gesture controls", "voice assistant", "AI features", "Windows 11",
-        "macOS", "Linux", "ChromeOS", "software updates", "firmware", "OS stability",
-        "driver support", "security patches", "app ecosystem", "multitasking support",
-        "interface design", "virtual assistant integration", "app store availability"
-    ],
-
-    # Cooling & Thermal Management
-    "cooling": [
-        "cooling","overheating", "fan noise", "heat dissipation", "thermal throttling",
-        "liquid cooling", "airflow", "heat pipes", "cooling pad", "vapor chamber",
-        "active cooling", "passive cooling", "temperature control", "thermal design power",
-        "fan placement", "fan control software"
-    ],
-
-    # Camera & Imaging
-    "camera": [
-        "camera","webcam", "camera resolution", "low-light performance", "autofocus",
-        "video quality", "megapixels", "Face ID", "portrait mode", "ultrawide",
-        "zoom", "optical image stabilization", "night mode", "depth sensor", "macro capability",
-        "color reproduction", "HDR video", "sensor size", "aperture", "white balance",
-        "wide-angle lens", "telephoto lens", "4K recording", "8K recording"
-    ],
-
-    # Security & Privacy
-    "security": [
-        "security", "fingerprint scanner", "Windows Hello", "privacy shutter", "TPM chip",
-        "encryption", "secure boot", "face recognition", "iris scanner", "biometric security",
-        "two-factor authentication", "password protection", "data encryption",
-        "firewall settings", "VPN integration", "antivirus compatibility"
-    ],
-
-    # Gaming & Graphics
-    "gaming": [
-        "gaming","ray tracing", "FPS", "VR gaming", "G-Sync", "FreeSync", "input lag",
-        "graphics card", "RGB lighting", "game compatibility", "frame rate consistency",
-        "latency", "anti-aliasing", "shader performance", "gaming benchmarks",
-        "VRR (Variable Refresh Rate)", "DLSS", "FSR (FidelityFX Super Resolution)"
-    ],
-
-    # Accessories & Expansion
-    "accessories": [
-        "accessories","stylus", "pen support", "dock", "external GPU", "external monitor", "VR headset",
-        "gaming controller", "webcam cover", "wireless charger", "case", "screen protector",
-        "portable charger", "headphone stand", "adapter", "cable management",
-        "portable docking station", "keyboard cover", "kickstand", "car mount"
-    ],
-
-    # Mobile-Specific Features
-    "mobile": [
-        "mobile","SIM", "dual SIM", "eSIM", "fast charging", "camera bump", "screen notch",
-        "water resistance", "5G connectivity", "foldable display", "biometric sensors",
-        "accelerometer", "gyroscope", "compass", "proximity sensor", "GPS", "magnetic sensor",
-        "removable battery", "removable back cover", "wireless power share"
-    ],
-
-    # AI or Smart Features
-    "AI_Features": [
-        "AI", "machine learning", "AI upscaling", "chatbot", "predictive text",
-        "smart home integration", "automation", "voice recognition", "natural language processing",
-        "personal assistant", "recommendation system", "adaptive learning", "context-aware computing",
-        "image recognition", "AI-based noise cancellation", "intelligent scene detection"
-    ],
-
-    # Cloud & Subscription Services
-    "cloud_Services": [
-        "cloud storage", "OneDrive", "Google Drive", "iCloud", "Dropbox", "streaming services",
-        "gaming cloud", "remote desktop", "cloud backup", "SaaS", "PaaS", "IaaS",
-        "subscription model", "licensing fees", "cloud sync", "cloud gaming platform"
-    ],
-
-    # Reliability & Longevity
-    "reliability": [
-        "reliability","long-term performance", "warranty", "customer support", "firmware updates",
-        "repairability", "modularity", "build durability", "consistency", "stability",
-        "upgradability", "error rate", "mean time between failures", "service plans",
-        "extended warranty", "mean time to repair", "hinge"
-    ],
-
-    # Sustainability & Environmental Impact
-    "sustainability": [
-        "sustainability", "energy star rating", "power efficiency", "recyclable materials",
-        "eco-friendly packaging", "carbon footprint", "green certifications",
-        "EPEAT rating", "renewable materials", "recycled plastics"
-    ],
-
-    # Maintenance & Support
-    "maintenance_support": [
-        "software patches", "driver updates", "tech support", "online help resources",
-        "user manual clarity", "replacement parts availability", "official repair centers",
-        "third-party repair", "customer service responsiveness", "remote troubleshooting"
-    ],
-}
-
-PRICING_TERMS = [
-    "expensive", "price", "cost", "worth", "value for money", "too costly",
-    "cheap", "budget", "overpriced", "reasonable price", "high cost", "cost-effective",
-    "premium pricing", "mid-range price", "low cost", "discounted price", "fair deal",
-    "money's worth", "not worth it", "steep price", "over-the-top pricing"
-]
+# bounded LRU of model scores shared by every job in the process, the same sentences and snippets come up across
+# aspects, sites and repeat searches of a product so most forward passes turn into lookups
+# misses fall through to the on-disk inference cache before reaching the model
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "50000"))
+_sentiment_cache = OrderedDict()
+_sentiment_cache_lock = threading.Lock()
+_sentiment_cache_stats = {"hits": 0, "misses": 0}
 
 BRAND_TERMS = [
     "iphone", "apple", "samsung", "galaxy", "pixel", "macbook", "ipad", "oneplus", "sony",
@@ -221,40 +41,89 @@ BRAND_TERMS = [
     "corsair", "msi", "redmi", "oppo", "vivo"
 ]
 
+# one pass of the compiled matcher replaces the old noun chunk and per keyword regex checks
+# returns where each aspect is first mentioned so the snippet window can be centred on it
 def extract_aspects(sentence):
-    aspects_found = set()
-    lower_sentence = sentence.lower()
-    doc = nlp(sentence)
-
-    # first check - noun chunking for then checking for matches
-    for chunk in doc.noun_chunks:
-        chunk_text = chunk.text.lower()
-        for category, keywords in TECH_ASPECTS.items():
-            if any(keyword in chunk_text for keyword in keywords):
-                aspects_found.add(category)
-    
-    # second check - direct regex match as SpaCy fails
-    for category, keywords in TECH_ASPECTS.items():
-        for keyword in keywords:
-            if re.search(rf"\b{re.escape(keyword)}\b", sentence.lower()):
-                aspects_found.add(category)
-
-    # additional pricing aspect if detected
-    if any(p in lower_sentence for p in PRICING_TERMS):
-        aspects_found.add("pricing")
+    return aspect_matcher.first_positions(sentence)
 
-    return list(aspects_found)
+# this model returns - 1 - 5 stars for sentiment classification, 1 - very negative, 5 - very positive
+def star_to_score(label):
+    star = int(label[0])
+    return (star - 3) / 2.0 # mapping to distribution between -1 and 1
+
+# the model is uncased and bert tokenization ignores spacing, so texts differing only in case or whitespace score the same
+def sentiment_cache_key(text):
+    return (SENTIMENT_MODEL, " ".join(text.lower().split()))
+
+def get_cached_sentiments(keys):
+    cached = {}
+    with _sentiment_cache_lock:
+        for key in keys:
+            if key in _sentiment_cache:
+                _sentiment_cache.move_to_end(key)
+                cached[key] = _sentiment_cache[key]
+        _sentiment_cache_stats["hits"] += len(cached)
+        _sentiment_cache_stats["misses"] += len(keys) - len(cached)
+    return cached
+
+def store_sentiments(scores):
+    with _sentiment_cache_lock:
+        for key, score in scores.items():
+            _sentiment_cache[key] = score
+            _sentiment_cache.move_to_end(key)
+        while len(_sentiment_cache) > SENTIMENT_CACHE_SIZE:
+            _sentiment_cache.popitem(last=False)
+
+def sentiment_cache_info():
+    with _sentiment_cache_lock:
+        return {**_sentiment_cache_stats, "size": len(_sentiment_cache), "max_size": SENTIMENT_CACHE_SIZE}
+
+def clear_sentiment_cache():
+    with _sentiment_cache_lock:
+        _sentiment_cache.clear()
+        _sentiment_cache_stats["hits"] = 0
+        _sentiment_cache_stats["misses"] = 0
+
+# batched scoring - every unique text goes through the model once, sorted by token length so each padded batch
+# holds similar lengths and wastes little compute on padding, scores are returned keyed by text for scattering back
+def get_snippet_sentiments(snippets, batch_size=32):
+    snippet_keys = {snippet: sentiment_cache_key(snippet) for snippet in dict.fromkeys(snippets)}
+    if not snippet_keys:
+        return {}
+
+    # only texts not already in the memory or disk cache go through the model
+    key_scores = get_cached_sentiments(list(dict.fromkeys(snippet_keys.values())))
+    missing = {}
+    for snippet, key in snippet_keys.items():
+        if key not in key_scores and key not in missing:
+            missing[key] = snippet
+
+    version = model_version(SENTIMENT_MODEL)
+    disk_hashes = {key: content_hash(key[1]) for key in missing}
+    disk_scores = get_outputs(SENTIMENT_MODEL, version, list(disk_hashes.values()))
+    found_on_disk = {key: disk_scores[disk_hashes[key]] for key in missing if disk_hashes[key] in disk_scores}
+    if found_on_disk:
+        store_sentiments(found_on_disk)
+        key_scores.update(found_on_disk)
+        missing = {key: snippet for key, snippet in missing.items() if key not in found_on_disk}
+
+    if missing:
+        unique_snippets = list(missing.values())
+
+        # truncation for the rare sentence over the model's 512 token limit, one long sentence would break its whole batch
+        outputs = run_length_bucketed(sentiment_pipeline, unique_snippets, batch_size, truncation=True)
+
+        new_scores = {}
+        for snippet, output in zip(unique_snippets, outputs):
+            new_scores[sentiment_cache_key(snippet)] = star_to_score(output["label"])
+        store_sentiments(new_scores)
+        put_outputs(SENTIMENT_MODEL, version, {disk_hashes[key]: score for key, score in new_scores.items()})
+        key_scores.update(new_scores)
+
+    return {snippet: key_scores[key] for snippet, key in snippet_keys.items()}
 
 def get_snippet_sentiment(snippet):
-    # this model returns - 1 - 5 stars for sentiment classification, 1 - very negative, 5 - very positive
-    outputs = sentiment_pipeline(snippet, top_k=None)
-
-    top_output = outputs[0]
-    label = top_output["label"]
-
-    star = int(label[0])
-    score = (star - 3) / 2.0 # mapping to distribution between -1 and 1
-    return score
+    return get_snippet_sentiments([snippet])[snippet]
 
 def apply_manual_rules(text_lower, base_score):
     sentiment_score = base_score
@@ -389,38 +258,41 @@ def get_aspect_snippet(doc, token_id):
 
     return snippet_text
 
-def get_aspect_sentiment(aspect, sentence):
-    doc = nlp(sentence)
-
+def find_aspect_snippet(aspect, doc, position, snippets_log):
     # identifying the token where the aspect is to gather the snippet
-    for i, token in enumerate(doc):
-        if token.text.lower() in TECH_ASPECTS.get(aspect, []): # fixed iterations breaking on none type
-            snippet_text = get_aspect_snippet(doc, i)
-            snippet_score = get_snippet_sentiment(snippet_text)
-            global_score = get_snippet_sentiment(sentence)
+    span = doc.char_span(position[0], position[1], alignment_mode="expand")
+    if span is None or len(span) == 0:
+        # no aspect token found, falls back to the whole sentence
+        return None
+
+    snippet_text = get_aspect_snippet(doc, span.start)
 
-            # debugging to remove
-            with open(snippets_log, "a", encoding="utf-8") as f:
-                f.write(f"Aspect: {aspect}\nSnippet: {snippet_text}\n\n")
+    # debugging to remove
+    with open(snippets_log, "a", encoding="utf-8") as f:
+        f.write(f"Aspect: {aspect}\nSnippet: {snippet_text}\n\n")
 
-            # adjusted slight weight to global score aswell for long sentences
-            combined = 0.90 * snippet_score + 0.10 * global_score
-            final_score = apply_manual_rules(sentence.lower(), combined)
-            return final_score
+    return snippet_text
+
+def get_aspect_sentiment(sentence, snippet_text, scores):
+    global_score = scores[sentence]
+
+    if snippet_text is not None:
+        # adjusted slight weight to global score aswell for long sentences
+        combined = 0.90 * scores[snippet_text] + 0.10 * global_score
+        final_score = apply_manual_rules(sentence.lower(), combined)
+        return final_score
 
     # fallback for no aspects
-    global_score = get_snippet_sentiment(sentence)
     final_score = apply_manual_rules(sentence.lower(), global_score)
     return final_score
 
-def get_sentiment(sentence, aspects):
+def get_sentiment(sentence, aspect_snippets, scores):
     aspect_scores = {}
-    for aspect in aspects:
-        aspect_scores[aspect] = get_aspect_sentiment(aspect, sentence)
+    for aspect, snippet_text in aspect_snippets.items():
+        aspect_scores[aspect] = get_aspect_sentiment(sentence, snippet_text, scores)
     return aspect_scores
 
-def is_meaningful(sentence, aspects):
-    overall_sent = get_snippet_sentiment(sentence)
+def is_meaningful(sentence, doc, aspects, product_name, overall_sent):
     lowered = sentence.lower()
 
     product_keywords = set(product_name.lower().split())
@@ -439,7 +311,6 @@ def is_meaningful(sentence, aspects):
         aspects.append("general")
         return True, overall_sent
 
-    doc = nlp(sentence)
     # final last chance if long sentence and strong sentiment
     if len(doc) >= 15 and abs(overall_sent) >= 0.9:
         aspects.append("general")
@@ -447,20 +318,37 @@ def is_meaningful(sentence, aspects):
 
     return False, 0
 
-def process_reviews(input_file, output_file):
+def process_reviews(input_file, output_file, product_name, snippets_log, batch_size=32):
     with open(input_file, "r", encoding="utf-8") as f:
         dataset = json.load(f)
 
-    filtered_results = []
+    sentences = []
     for entry in dataset:
         sentence = entry.get("original_text", "").strip()
-        if not sentence:
-            continue
-
-        aspects = extract_aspects(sentence)
-        sentiment_scores = get_sentiment(sentence, aspects)
+        if sentence:
+            sentences.append(sentence)
+
+    # pass 1 - each sentence parsed once in batches, the same doc is reused for aspects, snippets and the meaningful check
+    planned = []
+    for sentence, doc in zip(sentences, nlp.pipe(sentences, batch_size=256, disable=UNUSED_PIPES)):
+        aspect_positions = extract_aspects(sentence)
+        aspects = list(aspect_positions)
+        aspect_snippets = {aspect: find_aspect_snippet(aspect, doc, position, snippets_log) for aspect, position in aspect_positions.items()}
+        planned.append((sentence, doc, aspects, aspect_snippets))
+
+    # pass 2 - every sentence and snippet through the model together in batches
+    texts = []
+    for sentence, doc, aspects, aspect_snippets in planned:
+        texts.append(sentence)
+        texts.extend(snippet for snippet in aspect_snippets.values() if snippet is not None)
+    scores = get_snippet_sentiments(texts, batch_size)
+
+    # pass 3 - scatter scores back to each sentence
+    filtered_results = []
+    for sentence, doc, aspects, aspect_snippets in planned:
+        sentiment_scores = get_sentiment(sentence, aspect_snippets, scores)
 
-        meaningful, overall_score = is_meaningful(sentence, aspects)
+        meaningful, overall_score = is_meaningful(sentence, doc, aspects, product_name, scores[sentence])
 
         if meaningful:
             # fixed assign general if no aspect, as aspectless sentences are allowed now
@@ -473,15 +361,26 @@ def process_reviews(input_file, output_file):
         json.dump(filtered_results, f, indent=4)
 
     print(f"ABSA successfully completed for Google.")
+    print(f"Sentiment cache: {sentiment_cache_info()}")
+
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    input_file = job_path(job_id, "processed_dataset.json")
+    output_file = job_path(job_id, "analyzed_sentiments.json")
+    snippets_log = job_path(job_id, "snippets_log.txt")
+
+    with open(snippets_log, "w") as f:
+        pass
+
+    # for debugging
+    print(f"Processing reviews.")
+    process_reviews(input_file, output_file, product_name, snippets_log)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("No product name provided.")
         sys.exit(1)
 
-    target_product = sys.argv[1]
-    product_name = target_product
-
-    # for debugging
-    print(f"Processing reviews.")
-    process_reviews(input_file, output_file)
\ No newline at end of file
+    product_name = sys.argv[1]
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(product_name, job_id)
@@ -1,53 +1,50 @@
 import json
 import os
-import time
+import sys
 import re
 import openai
 import pandas as pd
 from nltk.tokenize import sent_tokenize
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from progress_tracking import update_progress
 from dotenv import load_dotenv
 
 load_dotenv()
 
-openai.api_key = os.getenv("SUMMARIZATION_API_KEY")
+# own client per module, a shared openai.api_key would be overwritten when stages run in the same process
+client = openai.OpenAI(api_key=os.getenv("SUMMARIZATION_API_KEY"))
 
 # Use relative path for portability
 script_dir = os.path.dirname(os.path.abspath(__file__))
-inputs_outputs_directory = os.path.join(script_dir, "../inputs-outputs/")
-comments_file = os.path.join(inputs_outputs_directory, "cleaned_youtube_comments.csv")
-ABSA_file = os.path.join(inputs_outputs_directory, "processed_dataset.json")
-output_file = os.path.join(inputs_outputs_directory, "both_summaries.txt")
-
-changed_files = set()
-
-# Added watchdog functionality with AI for file tracking
-
-def load_comments():
+sys.path.append(os.path.join(script_dir, "../Shared_Module"))
+from http_client import chat_completion
+from llm_cache import cached_completion
+from prompt_budget import Section, data_budget, fill_sections
+from representative_sample import representative_order
+from workspace import job_path
+
+# prompt data budget in model tokens, split evenly between the comments and the google sentences
+SUMMARY_DATA_TOKENS = 8000
+SUMMARY_REPLY_TOKENS = 600 # two 150 word summaries
+
+def load_comments(comments_file):
     try:
         df = pd.read_csv(comments_file)
-        comments = df["cleaned_comment"].dropna().tolist()
-        return " ".join(comments[:100])  # limited for token size
+        return df["cleaned_comment"].dropna().tolist() # cut to the token budget when the prompt is built
     except Exception as e:
         print(f"Error opening file: {e}")
-        return ""
+        return []
 
 def load_sentences(json_filepath):
-    time.sleep(3) # fix for loading massive file being cut off after observer
-
     try:
         with open(json_filepath, "r", encoding="utf-8") as f:
             data = json.load(f)
     except Exception as e:
         print(f"Error opening file: {e}")
-        return ""
+        return []
 
     all_sentences = [sent_tokenize(entry.get("original_text", "")) for entry in data]
     all_sentences = [s for list in all_sentences for s in list]  # flatten list fixed
 
-    return " ".join(all_sentences[:100]) # adjustable max for token limit (100 sentences)
+    return all_sentences
 
 def generate_summaries(comments_text, sentences_text):
     system_content = (
@@ -71,64 +68,39 @@ def generate_summaries(comments_text, sentences_text):
         "Label them exactly as '=== Summary for Comments ===' and '=== Summary for Sentences ==='."
     )
 
-    response = openai.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "system", "content": system_content}, {"role": "user", "content": data_content}], temperature=0.7)
-    output = response.choices[0].message.content
+    messages = [{"role": "system", "content": system_content}, {"role": "user", "content": data_content}]
+
+    def complete():
+        response = chat_completion(client, model="gpt-4o-mini", messages=messages, temperature=0.7)
+        return response.choices[0].message.content
+
+    # same comments and sentences as an earlier run come back from the shared llm cache
+    output = cached_completion("openai", "gpt-4o-mini", messages, {"temperature": 0.7}, complete)
 
     print(f"GPT Response: {output}")
 
     return output
 
-def run_summarization(observer):
+# stage entry point used by the pipeline graph, which only starts it once both input files have been written
+def run(product_name, job_id=None):
     print("Running summarization...")
 
-    comments_content = load_comments()
-    sentences_text = load_sentences(ABSA_file)
+    comments = load_comments(job_path(job_id, "cleaned_youtube_comments.csv"))
+    sentences = load_sentences(job_path(job_id, "processed_dataset.json"))
 
-    combined_summaries = generate_summaries(comments_content, sentences_text)
+    # most representative comments and sentences first, as many as fit the token budget
+    budget = data_budget(SUMMARY_DATA_TOKENS, reply_tokens=SUMMARY_REPLY_TOKENS)
+    sections = [Section("comments", representative_order(comments)), Section("sentences", representative_order(sentences))]
+    blocks = fill_sections(sections, budget)
 
-    with open(output_file, "w", encoding="utf-8") as out:
-        out.write(combined_summaries + "\n")
+    combined_summaries = generate_summaries(blocks["comments"], blocks["sentences"])
 
-    update_progress("summary", 100)
+    with open(job_path(job_id, "both_summaries.txt"), "w", encoding="utf-8") as out:
+        out.write(combined_summaries + "\n")
 
     print(f"AI Summarization done")
 
-    # Stop observer now that both files have changed
-    observer.stop()
-    print("Stopping observer after detecting changes in both files.")
-
-class InputFilesEventHandler(FileSystemEventHandler):
-    def __init__(self, observer):
-        self.observer = observer
-        self.files_changed = set()
-
-    def on_modified(self, event):
-        if event.is_directory:
-            return
-
-        changed_file = os.path.abspath(event.src_path)
-
-        if changed_file in {comments_file, ABSA_file}:
-            self.files_changed.add(changed_file)
-            print(f"Detected change in: {changed_file}")
-
-        # Run summarization only when BOTH files have changed
-        if {comments_file, ABSA_file}.issubset(self.files_changed):
-            run_summarization(self.observer)
-
-    def on_created(self, event):
-        self.on_modified(event)  # Treat newly created files the same as modified ones
-
 if __name__ == "__main__":
-    # added manual watchdog observer, watch until changes are detected -> new product search with new output files
-    # run summarization on newly loaded data
-    observer = Observer()
-    handler = InputFilesEventHandler(observer)
-    observer.schedule(handler, path=inputs_outputs_directory, recursive=False)
-
-    observer.start()
-
-    while observer.is_alive():
-        time.sleep(1)
-
-    observer.join()
+    # product name is passed by the backend but unused here, job id picks which folder to read
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(None, job_id)
@@ -1,4 +1,5 @@
 import os
+import sys
 import csv
 import json
 import re
@@ -7,45 +8,38 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-openai.api_key = os.getenv("TLDR_API_KEY")
+# own client per module, a shared openai.api_key would be overwritten when stages run in the same process
+client = openai.OpenAI(api_key=os.getenv("TLDR_API_KEY"))
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-
-transcripts_csv_path = os.path.join(script_dir, "../inputs-outputs/condensed_transcripts.csv")
-comments_csv_path = os.path.join(script_dir, "../inputs-outputs/cleaned_youtube_comments.csv")
-processed_json_path = os.path.join(script_dir, "../inputs-outputs/analyzed_sentiments.json")
-log_file = os.path.join(script_dir, "tldr_output.log")
-
+sys.path.append(os.path.join(script_dir, "../Shared_Module"))
+from http_client import chat_completion
+from llm_cache import cached_completion
+from prompt_budget import Section, data_budget, fill_sections
+from representative_sample import representative_order
+from workspace import job_path
+
+# prompt data budget in model tokens, transcripts get half (shared evenly between videos), comments and ABSA
+# sentences a quarter each, a block that needs less hands the rest to the others
+TLDR_DATA_TOKENS = 4000
+TLDR_REPLY_TOKENS = 300
+
+# the three blocks are cut to the token budget when the prompt is built
 def load_transcripts(csv_path):
     all_text = []
     with open(csv_path, mode="r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            row.get("text")
-            transcript_text = row["text"].strip()
-            words = transcript_text.split()
-            # 150 words max per transcript for token limit
-            truncated_words = words[:150]
-            truncated_text = " ".join(truncated_words)
-            all_text.append(truncated_text)
-    return "\n".join(all_text)
+            all_text.append(row["text"].strip())
+    return all_text
 
 def load_comments(csv_path):
     all_comments = []
     with open(csv_path, mode="r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            row.get("cleaned_comment")
             all_comments.append(row["cleaned_comment"])
-
-    combined_text = " ".join(all_comments)
-
-    # 300 words max for comment block for token limit
-    words = combined_text.split()
-    truncated_words = words[:300]
-    truncated_text = " ".join(truncated_words)
-
-    return truncated_text
+    return all_comments
 
 def load_ABSA(json_path):
     all_sentences = []
@@ -54,17 +48,9 @@ def load_ABSA(json_path):
         for obj in data:
             if obj.get("sentence"):
                 all_sentences.append(obj["sentence"])
-    
-    combined_text = " ".join(all_sentences)
-    
-    # 400 words max for ABSA block for token limit
-    words = combined_text.split()
-    truncated_words = words[:400]
-    truncated_text = " ".join(truncated_words)
-    
-    return truncated_text
-
-def generate_summary(all_data):
+    return all_sentences
+
+def generate_summary(all_data, log_file):
     prompt = f"""
     Output ONE JSON object with three short fields that cover 3 VERY SHORT summaries:
 
@@ -83,8 +69,13 @@ def generate_summary(all_data):
     Now produce the JSON object with every field:
     """
 
-    response = openai.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "system", "content": "You summarize product data and provide risk and buy/do-not-buy recommendation."}, {"role": "user", "content": prompt}], temperature=0.7, max_tokens=300)
-    raw_text = response.choices[0].message.content.strip()
+    messages = [{"role": "system", "content": "You summarize product data and provide risk and buy/do-not-buy recommendation."}, {"role": "user", "content": prompt}]
+
+    def complete():
+        response = chat_completion(client, model="gpt-4o-mini", messages=messages, temperature=0.7, max_tokens=300)
+        return response.choices[0].message.content.strip()
+
+    raw_text = cached_completion("openai", "gpt-4o-mini", messages, {"temperature": 0.7, "max_tokens": 300}, complete)
 
     with open(log_file, "w", encoding="utf-8") as f:
         f.write(raw_text)
@@ -100,13 +91,32 @@ def generate_summary(all_data):
 
     output = "\n".join([summary, risk, recommendation])
     print(output)
+    return output
 
-if __name__ == "__main__":
-    transcripts_text = load_transcripts(transcripts_csv_path)
-    comments_text = load_comments(comments_csv_path)
-    processed_text = load_ABSA(processed_json_path)
+# stage entry point used by the pipeline graph, writes and returns the three verdict lines
+def run(product_name, job_id=None):
+    transcripts_csv_path = job_path(job_id, "condensed_transcripts.csv")
+    comments_csv_path = job_path(job_id, "cleaned_youtube_comments.csv")
+    processed_json_path = job_path(job_id, "analyzed_sentiments.json")
+    log_file = job_path(job_id, "tldr_output.log")
+
+    sections = [
+        Section("transcripts", load_transcripts(transcripts_csv_path), weight=2, separator="\n", even=True),
+        # a spread of the most representative comments and sentences rather than the first ones collected
+        Section("comments", representative_order(load_comments(comments_csv_path))),
+        Section("absa", representative_order(load_ABSA(processed_json_path))),
+    ]
+    blocks = fill_sections(sections, data_budget(TLDR_DATA_TOKENS, reply_tokens=TLDR_REPLY_TOKENS))
 
-    combined_text = "\n".join([transcripts_text, comments_text, processed_text])
+    combined_text = "\n".join([blocks["transcripts"], blocks["comments"], blocks["absa"]])
 
-    generate_summary(combined_text)
+    output = generate_summary(combined_text, log_file)
 
+    with open(job_path(job_id, "tldr_summary.txt"), "w", encoding="utf-8") as f:
+        f.write(output + "\n")
+
+    return output
+
+if __name__ == "__main__":
+    job_id = sys.argv[1] if len(sys.argv) > 1 else None
+    run(None, job_id)
@@ -1,27 +1,68 @@
 import os
+import sys
+import math
 import pandas as pd
-import ast
 import re
-import json
 import torch
-from transformers import pipeline
 
 # Simple script using facebook LLM for advanced zero-shot-classification
 # Could of implemented ABSA logic from Google ABSA, but tried a different approach for this
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_dir, "../Shared_Module"))
+from columnar import read_table, write_table
+from inference_cache import cached_outputs
+from models import ZERO_SHOT_MODEL, load_zero_shot_classifier, model_version
+from workspace import job_path
 
-input_file = os.path.join(script_dir, "../inputs-outputs/cleaned_youtube_transcripts.csv")
-output_file = os.path.join(script_dir, "../inputs-outputs/processed_youtube_transcripts.csv")
+# facebook/bart-large-mnli from the shared registry so the backend worker pool only loads it once
+classifier = load_zero_shot_classifier()
 
-model = "facebook/bart-large-mnli"
-classifier = pipeline("zero-shot-classification", model=model, truncation=True, max_length=512)
+# same hypothesis wording the zero-shot pipeline uses by default
+HYPOTHESIS_TEMPLATE = "This example is {}."
 
-def extract_sentiment(sentence, aspect):
+def sentiment_labels(aspect):
     # tweaked prompts to be simple for clarity  
-    labels = [f"positive about {aspect}", f"negative about {aspect}", f"neutral about {aspect}"]
-    result = classifier(sentence, labels)
-
+    return [f"positive about {aspect}", f"negative about {aspect}", f"neutral about {aspect}"]
+
+# all (sentence, hypothesis) pairs of a batch of sentences and aspects go through the nli model together instead of
+# one pipeline call per pair, bart is a cross-encoder so the premise can't be encoded once and reused, but batching
+# pairs sorted by length removes the per call overhead and most padding
+def classify_batch(inputs, batch_size=32):
+    model = classifier.model
+    tokenizer = classifier.tokenizer
+    entailment_id = next(i for label, i in model.config.label2id.items() if label.lower().startswith("entail"))
+
+    pairs = [(sentence, HYPOTHESIS_TEMPLATE.format(label)) for sentence, labels in inputs for label in labels]
+    token_lengths = tokenizer([p[0] for p in pairs], [p[1] for p in pairs], add_special_tokens=False)["input_ids"]
+    order = sorted(range(len(pairs)), key=lambda k: len(token_lengths[k]), reverse=True)
+
+    entailment_logits = [0.0] * len(pairs)
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer([pairs[k][0] for k in batch], [pairs[k][1] for k in batch], truncation="only_first", max_length=512, padding=True, return_tensors="pt").to(model.device)
+            logits = model(**encoded).logits[:, entailment_id].tolist()
+            for k, logit in zip(batch, logits):
+                entailment_logits[k] = logit
+
+    # softmax of the entailment logits over each sentence's labels, same scoring as the pipeline
+    results = []
+    position = 0
+    for sentence, labels in inputs:
+        group = entailment_logits[position:position + len(labels)]
+        position += len(labels)
+
+        top = max(group)
+        exps = [math.exp(logit - top) for logit in group]
+        total = sum(exps)
+        ranked = sorted(zip(labels, [e / total for e in exps]), key=lambda x: x[1], reverse=True)
+
+        results.append({"sequence": sentence, "labels": [label for label, _ in ranked], "scores": [score for _, score in ranked]})
+
+    return results
+
+def extract_sentiment(result):
     best_label = result["labels"][0].lower()
     best_score = result["scores"][0]
 
@@ -34,31 +75,39 @@ def extract_sentiment(sentence, aspect):
 
     return sentiment, best_score
 
-if __name__ == "__main__":
-    df = pd.read_csv(input_file)
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    input_file = job_path(job_id, "cleaned_youtube_transcripts.arrow")
+    output_file = job_path(job_id, "processed_youtube_transcripts.arrow")
 
-    output_rows = []
+    df = read_table(input_file)
 
-    # loop and apply for each row
-    for _, row in df.iterrows():
-        video_id = row["video_id"]
-        title = row["title"]
-        sentence = str(row["sentence"])
-        # fixed not processing lists with literal_eval
-        aspects = ast.literal_eval(row["aspect_labels"])
+    rows = []
+    for video_id, title, sentence, aspect_labels in zip(df["video_id"], df["title"], df["sentence"], df["aspect_labels"]):
+        # stored as a list column, comes back as an array
+        aspects = list(aspect_labels)
 
-        if not aspects:
-            continue
+        if aspects:
+            rows.append((video_id, title, str(sentence), aspects))
 
-        aspect_sentiments = {}
-        for aspect in aspects:
-            model_label, model_score = extract_sentiment(sentence, aspect)
-            aspect_sentiments[aspect] = { "sentiment_label": model_label, "sentiment_score": model_score }
+    # every (sentence, aspect) in one cached, batched pass, sentence and labels together make up the cache key
+    inputs = [[sentence, sentiment_labels(aspect)] for _, _, sentence, aspects in rows for aspect in aspects]
+    results = iter(cached_outputs(ZERO_SHOT_MODEL, model_version(ZERO_SHOT_MODEL), inputs, classify_batch))
 
-        aspect_sentiments_json = json.dumps(aspect_sentiments)
+    output_rows = []
+    for video_id, title, sentence, aspects in rows:
+        # one struct per aspect, kept as a native list column
+        aspect_sentiments = []
+        for aspect in aspects:
+            model_label, model_score = extract_sentiment(next(results))
+            aspect_sentiments.append({ "aspect": aspect, "sentiment_label": model_label, "sentiment_score": model_score })
 
-        output_rows.append({"video_id": video_id, "title": title, "sentence": sentence, "aspect_sentiments": aspect_sentiments_json})
+        output_rows.append({"video_id": video_id, "title": title, "sentence": sentence, "aspect_sentiments": aspect_sentiments})
 
     final_df = pd.DataFrame(output_rows)
-    final_df.to_csv(output_file, index=False)
-    print(f"Zero-shot classification successfully completed.")
\ No newline at end of file
+    write_table(final_df, output_file)
+    print(f"Zero-shot classification successfully completed.")
+
+if __name__ == "__main__":
+    job_id = sys.argv[1] if len(sys.argv) > 1 else None
+    run(None, job_id)
@@ -7,13 +7,19 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-openai.api_key = os.getenv("TRANSCRIPT_API_KEY")
+# own client per module, a shared openai.api_key would be overwritten when stages run in the same process
+client = openai.OpenAI(api_key=os.getenv("TRANSCRIPT_API_KEY"))
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_dir, "../Shared_Module"))
+from http_client import chat_completion
+from llm_cache import cached_completion
+from prompt_budget import Section, data_budget, fill_sections
+from workspace import job_path
 
-input_file = os.path.join(script_dir, '../inputs-outputs/condensed_transcripts.csv')
-benefits_drawbacks_file = os.path.join(script_dir, '../inputs-outputs/benefits_drawbacks.json')
-keywords_file = os.path.join(script_dir, '../inputs-outputs/tech_keywords.json')
+# prompt data budget in model tokens, shared evenly between the videos' condensed transcripts
+TRANSCRIPT_DATA_TOKENS = 16000
+TRANSCRIPT_REPLY_TOKENS = 1500 # benefits, drawbacks and 20 keywords as json
 
 system_prompt = """
     You are a product review analysis assistant specialized in parsing video transcripts of tech enthusiasts about the target product: {product_name}.
@@ -48,18 +54,24 @@ system_prompt = """
     Be concise but capture the essence of the enthusiast opinions.
 """
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Enter a product name as a second argument.")
-        sys.exit(1)
-
-    product_name = sys.argv[1]
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    input_file = job_path(job_id, "condensed_transcripts.csv")
+    benefits_drawbacks_file = job_path(job_id, "benefits_drawbacks.json")
+    keywords_file = job_path(job_id, "tech_keywords.json")
 
     df = pd.read_csv(input_file)
-    transcript_text = ' '.join(df['text'].dropna().tolist())
+    # every video gets a fair share of the budget instead of sending all transcripts with no limit
+    budget = data_budget(TRANSCRIPT_DATA_TOKENS, system_prompt, TRANSCRIPT_REPLY_TOKENS)
+    transcript_text = fill_sections([Section("transcripts", df['text'].dropna().tolist(), even=True)], budget)["transcripts"]
     
-    response = openai.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": transcript_text}], temperature=0.3)
-    response_text = response.choices[0].message.content
+    messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": transcript_text}]
+
+    def complete():
+        response = chat_completion(client, model="gpt-4o-mini", messages=messages, temperature=0.3)
+        return response.choices[0].message.content
+
+    response_text = cached_completion("openai", "gpt-4o-mini", messages, {"temperature": 0.3}, complete)
 
     if response_text.startswith("```json"):
         response_text = response_text.replace("```json", "").replace("```", "").strip()
@@ -78,3 +90,12 @@ if __name__ == "__main__":
         json.dump({"tech_keywords": data['tech_keywords']}, f, indent=4)
 
     print("Transcript LLM script done.")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Enter a product name as a second argument.")
+        sys.exit(1)
+
+    product_name = sys.argv[1]
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(product_name, job_id)
@@ -0,0 +1,499 @@
+import csv
+import json
+import os
+import sys
+import openai
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+client = openai.OpenAI(api_key=os.getenv("BACKEND_API_KEY"))
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_dir, "../Shared_Module"))
+from columnar import read_table
+from http_client import chat_completion
+from llm_cache import cached_completion
+from prompt_budget import count_tokens, truncate_to_tokens
+from workspace import job_path
+
+# final pipeline stage, builds the whole /api/results document once every other stage is done and stores it
+# in the job folder, so the endpoint only has to send the stored bytes instead of doing this work per request
+
+# long format table with one row per (sentence, aspect, score) of the google ABSA output, every feature
+# aggregation below is a group-by over this instead of a loop over the reviews
+def aspect_score_table(data):
+    rows = [(review.get("sentence", "").strip(), aspect, score) for review in data for aspect, score in review.get("sentiment_scores", {}).items()]
+    return pd.DataFrame(rows, columns=["sentence", "aspect", "score"])
+
+# 0.2 space for neutrality adjusted, -0.1 < x < 0.1
+def sentiment_percentages(scores):
+    total = len(scores)
+    if total == 0:
+        return 0, 0, 0
+
+    positive_count = int((scores > 0.1).sum())
+    negative_count = int((scores < -0.1).sum())
+    neutral_count = total - positive_count - negative_count
+
+    positive_percentage = round((positive_count / total) * 100, 2)
+    negative_percentage = round((negative_count / total) * 100, 2)
+    neutral_percentage = round((neutral_count / total) * 100, 2)
+
+    total_percentage = positive_percentage + negative_percentage + neutral_percentage
+    # if slight overflow append to neutral percentage to prevent errors
+    if total_percentage != 100.0:
+        adjustment = 100.0 - total_percentage
+        neutral_percentage += round(adjustment, 2)
+
+    return positive_percentage, negative_percentage, neutral_percentage
+
+# mention count, mean, boosted score and star rating per aspect, aspects in the order they first appear
+def aspect_aggregates(table):
+    grouped = table.groupby("aspect", sort=False)["score"]
+    aggregates = pd.DataFrame({"count": grouped.size(), "mean": grouped.mean()})
+
+    # boost to 10% if score is really low
+    boosted_mean = aggregates["mean"].clip(lower=0.1)
+
+    # further boosting scores - added for normalization (0.45)
+    aggregates["boosted"] = boosted_mean ** 0.45
+
+    # star rating weighting logic - 0.6 from mean + 0.4 from main score
+    combined_score = 0.6 * aggregates["mean"] + 0.4 * boosted_mean
+    aggregates["stars"] = np.select([combined_score < 0, combined_score < 0.1, combined_score < 0.3, combined_score < 0.5], [1, 2, 3, 4], default=5)
+
+    return aggregates
+
+# aspect summaries are requested in groups of aspects whose text fits this many prompt tokens, groups run at once
+# so the whole step takes about as long as the biggest group instead of growing with the total text
+SUMMARY_GROUP_TOKENS = 2500
+SUMMARY_TOKENS_PER_ASPECT = 120 # reply budget per aspect in a group
+SUMMARY_WORKERS = 4
+
+# aspects in order, packed into groups under the token budget, an aspect bigger than the budget gets its own group
+# with its text cut down to fit
+def group_aspects(aspect_text_map, token_budget=SUMMARY_GROUP_TOKENS):
+    groups = []
+    current, current_tokens = {}, 0
+
+    for aspect, text in aspect_text_map.items():
+        tokens = count_tokens(text)
+        if tokens > token_budget:
+            text = truncate_to_tokens(text, token_budget)
+            tokens = token_budget
+
+        if current and current_tokens + tokens > token_budget:
+            groups.append(current)
+            current, current_tokens = {}, 0
+
+        current[aspect] = text
+        current_tokens += tokens
+
+    if current:
+        groups.append(current)
+
+    return groups
+
+def summary_prompt(aspect_text_map, aspect_scores, product_name):
+    aspects = ", ".join(aspect_text_map.keys())
+
+    instructions = (
+        f"Below is a collection of aspects, each with a block of text. "
+        f"For each aspect, please provide a SINGLE-SENTENCE summary of the text. Provide a summary for EVERY single aspect in this list: {aspects}. If there is not enough information then use your own knowledge for the summary, but always use the data provided primarily."
+        f"The summary MUST be about the target product: {product_name}"
+        "The summary MUST reflect the aspect score given. If the aspect score is above 75, give a very positive summary of pros ONLY. If the aspect score is between 70 and 90, give a positive summary of pros and rarely include a con if found. If the aspect score is between 45 and 70, give a neutral toned summary of pros and cons. If the aspect score is below 45, give a negative summary of cons."
+        "AVOID discussing the same points across multiple features. Prices must be in GBP."
+        "Return each aspect name on its own line, with no extra punctuation or bold styling and lowercase, followed by its summary on the next line. Don’t use any markdown, punctuation, or blank lines."
+    )
+
+    group_scores = {aspect: aspect_scores[aspect] for aspect in aspect_text_map if aspect in aspect_scores}
+    aspects_json = json.dumps(aspect_text_map, ensure_ascii=False)
+    aspects_scores_json = json.dumps(group_scores, ensure_ascii=False)
+    return f"{instructions}\n\nASPECT SCORES:{aspects_scores_json}\n\nASPECTS TEXTS:\n{aspects_json}\n\n"
+
+# aspect name line followed by its summary line, only names of aspects that were asked for are kept
+def parse_summaries(raw_content, aspects):
+    # fixed strippling and handling lines with AI as this was breaking on cases
+    stripped_lines = [line.strip() for line in raw_content.strip().splitlines() if line.strip()]
+    wanted = {aspect.lower(): aspect for aspect in aspects}
+
+    summary_dict = {}
+    i = 0
+    while i + 1 < len(stripped_lines):
+        aspect = wanted.get(stripped_lines[i].rstrip(":").strip().lower())
+        if aspect is None:
+            i += 1
+            continue
+
+        summary_dict[aspect] = stripped_lines[i + 1]
+        i += 2
+
+    return summary_dict
+
+def summarize_group(aspect_text_map, aspect_scores, product_name, retry=False):
+    user_prompt = summary_prompt(aspect_text_map, aspect_scores, product_name)
+    max_tokens = SUMMARY_TOKENS_PER_ASPECT * len(aspect_text_map)
+
+    # gpt-4o-mini (adjustable)
+    # adjust temp
+    messages = [{"role": "system", "content": "You are a concise assistant that summarizes text."}, {"role": "user", "content": user_prompt}]
+
+    def complete():
+        response = chat_completion(client, model="gpt-4o-mini", messages=messages, temperature=0.4, max_tokens=max_tokens)
+        content = response.choices[0].message.content
+
+        # a reply cut off at max_tokens ends mid summary, the unfinished line is dropped so that aspect is asked again
+        if response.choices[0].finish_reason == "length":
+            content = "\n".join(content.rstrip().splitlines()[:-1])
+        return content
+
+    try:
+        # a retry can have the same prompt as a reply that missed aspects, so it skips the cache
+        raw_content = cached_completion("openai", "gpt-4o-mini", messages, {"temperature": 0.4, "max_tokens": max_tokens}, complete, bypass=retry)
+    except Exception as e:
+        print(f"Summarization failed: {e}")
+        return {}
+
+    return parse_summaries(raw_content, aspect_text_map.keys())
+
+def summarize_groups(groups, aspect_scores, product_name, retry=False):
+    with ThreadPoolExecutor(max_workers=min(SUMMARY_WORKERS, len(groups))) as executor:
+        return list(executor.map(lambda group: summarize_group(group, aspect_scores, product_name, retry), groups))
+
+def extract_summaries(aspect_text_map, aspect_scores, product_name):
+    if not aspect_text_map:
+        return {}
+
+    groups = group_aspects(aspect_text_map)
+    summary_dict = {}
+    for summaries in summarize_groups(groups, aspect_scores, product_name):
+        summary_dict.update(summaries)
+
+    # aspects left out of a reply (cut off or skipped by the model) get one more request of their own
+    missing = {aspect: text for group in groups for aspect, text in group.items() if aspect not in summary_dict}
+    if missing:
+        print(f"Retrying summaries for {len(missing)} aspect(s) missing from the replies.")
+        for summaries in summarize_groups(group_aspects(missing), aspect_scores, product_name, retry=True):
+            summary_dict.update(summaries)
+
+    # same order as the aspects were given in
+    return {aspect: summary_dict[aspect] for aspect in aspect_text_map if aspect in summary_dict}
+
+def process_feature_sentiments(table, product_name):
+    aggregates = aspect_aggregates(table)
+
+    # group into blocks per aspect, fixed
+    aspect_texts = table.groupby("aspect", sort=False)["sentence"].agg(" ".join).str.strip()
+    aspect_text_map = aspect_texts[aspect_texts != ""].to_dict()
+
+    aspect_summaries = extract_summaries(aspect_text_map, aggregates["boosted"].to_dict(), product_name)
+
+    feature_counts = {aspect: int(count) for aspect, count in aggregates["count"].items()}
+
+    # descending sort on the rounded score, stable so ties keep their original order
+    aggregates["sentiment_score"] = aggregates["boosted"].round(3)
+    aggregates = aggregates.sort_values("sentiment_score", ascending=False, kind="stable")
+
+    feature_summaries = [
+        {"feature": row.Index, "sentiment_score": row.sentiment_score, "star_rating": int(row.stars), "example_sentence": aspect_summaries.get(row.Index, "No summary available.")}
+        for row in aggregates.itertuples()
+    ]
+
+    return feature_summaries, feature_counts
+
+def load_emotion_data(job_id):
+    return read_table(job_path(job_id, "processed_youtube_comments.arrow"))
+
+def process_emotion_distribution(df):
+    # one row per (comment, emotion) from the list of label / score structs, comments that couldn't be scored have none
+    emotions = df["emotion_analysis"].dropna().explode().dropna()
+    if emotions.empty:
+        return {}
+
+    scores = pd.DataFrame(emotions.tolist(), columns=["label", "score"])
+    return scores.groupby("label", sort=False)["score"].mean().round(4).to_dict()
+
+def process_sentiment_distribution(df):
+    counts = df["sentiment"].astype(str).str.lower().value_counts()
+    return {sentiment: int(counts.get(sentiment, 0)) for sentiment in ["positive", "mixed", "negative"]}
+
+# confident, long enough comments grouped by a label column, shortened for display and deduplicated per label
+def comments_by_label(df, label_column):
+    comments = df["cleaned_comment"].astype(str).str.strip()
+    labels = df[label_column].astype(str).str.strip().str.lower()
+
+    # final filter pass before display
+    keep = (df["emotion_score"] >= 0.7) & (comments.str.split().str.len() > 20) & (labels != "")
+    comments, labels = comments[keep], labels[keep]
+
+    short_comments = comments.where(comments.str.len() <= 300, comments.str[:300] + "...")
+
+    display = pd.DataFrame({"label": labels, "comment": short_comments, "seen": short_comments.str.lower()})
+    display = display.drop_duplicates(["label", "seen"])
+
+    return display.groupby("label", sort=False)["comment"].agg(list).to_dict()
+
+def get_sentiment_comments(emotion_data):
+    return comments_by_label(emotion_data, "sentiment")
+
+def get_emotion_comments(emotion_data):
+    return comments_by_label(emotion_data, "top_emotion")
+
+def load_summaries(job_id):
+    with open(job_path(job_id, "both_summaries.txt"), "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    if len(lines) < 5:
+        raise ValueError("Not enough summary data returned.")
+
+    comment_summary = lines[1].strip()
+    google_summary = lines[4].strip()
+
+    return comment_summary, google_summary
+
+def load_comparison_data(job_id):
+    try:
+        with open(job_path(job_id, "comparison_output.txt"), "r", encoding="utf-8") as f:
+            raw_text = f.read().strip()
+    except Exception as e:
+        print(f"Error opening file: {e}")
+
+    product_blocks = raw_text.split("\n\n")
+
+    comparison_data = []
+    for block in product_blocks:
+        lines = [line.strip() for line in block.splitlines() if line.strip()]
+        if not lines:
+            continue
+
+        product_info = {}
+        for line in lines:
+            # carefully extracting from intended file structure fixed
+            parts = line.split(":", maxsplit=1)
+            if len(parts) == 2:
+                key = parts[0].strip()
+                value = parts[1].strip()
+                product_info[key] = value
+
+        if product_info:
+            comparison_data.append(product_info)
+
+    return comparison_data
+
+def load_best_features(job_id):
+    try:
+        with open(job_path(job_id, "best_features.txt"), "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+    except Exception as e:
+        print(f"Error opening file: {e}")
+
+    best_features = []
+    for line in lines:
+        parts = line.split(" - ")
+        if len(parts) < 3:
+            continue
+
+        product_part = parts[0].strip()
+        feature_part = parts[1].strip()
+
+        reason_part = parts[2]
+        reason_text = reason_part.replace("Reason:", "").strip()
+
+        best_features.append({"product": product_part, "feature": feature_part, "reason": reason_text})
+
+    return best_features
+
+def process_transcripts(job_id):
+    try:
+        df = read_table(job_path(job_id, "processed_youtube_transcripts.arrow"), columns=["aspect_sentiments"])
+    except Exception as e:
+        print(f"Error opening file: {e}")
+
+    # one row per (sentence, aspect) from the list of aspect / sentiment structs
+    aspect_rows = df["aspect_sentiments"].explode().dropna()
+    if aspect_rows.empty:
+        return {}
+
+    sentiments = pd.DataFrame(aspect_rows.tolist(), columns=["aspect", "sentiment_label"])
+
+    # extract top 3 most mentioned
+    aspect_count = sentiments.groupby("aspect", sort=False).size()
+    top_aspects = aspect_count.sort_values(ascending=False, kind="stable").index[:3]
+
+    # normalizing for piechart display, proportion relative to total counts
+    label_counts = sentiments[sentiments["aspect"].isin(top_aspects)].groupby(["aspect", "sentiment_label"], sort=False).size()
+    proportions = (label_counts / label_counts.groupby(level="aspect").transform("sum")).round(3)
+
+    return {aspect: proportions[aspect].to_dict() for aspect in top_aspects}
+
+def load_benefits_drawbacks(job_id):
+    with open(job_path(job_id, "benefits_drawbacks.json"), 'r') as file:
+        data = json.load(file)
+    return data.get("top_benefits", []), data.get("top_drawbacks", [])
+
+def load_keywords(job_id):
+    with open(job_path(job_id, "tech_keywords.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    result = {}
+    for item in data.get("tech_keywords", []):
+        key = item["keyword"]
+        value = item["significance"]
+        result[key] = value
+
+    return result
+
+def calculate_stats(job_id):
+    stats = {}
+
+    with open(job_path(job_id, "google_discussion_links.txt"), 'r', encoding='utf-8') as f:
+        google_sites = len(f.readlines())
+    stats['google_sites_processed'] = google_sites
+
+    with open(job_path(job_id, "analyzed_sentiments.json"), 'r', encoding='utf-8') as f:
+        sentiments = json.load(f)
+
+    total_sentences = 0
+    for entry in sentiments:
+        if entry["sentence"]:
+            total_sentences += 1
+    stats["sentences_analyzed"] = total_sentences
+
+    with open(job_path(job_id, "youtube_comments.csv"), 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader) # fixed header
+        total_rows = 0
+        for row in reader:
+            total_rows += 1
+    stats["youtube_comments_total"] = total_rows
+
+    with open(job_path(job_id, "cleaned_youtube_comments.csv"), 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        cleaned_total = 0
+        for row in reader:
+            cleaned_total += 1
+    stats["youtube_comments_filtered"] = cleaned_total
+
+    with open(job_path(job_id, "youtube_transcripts.csv"), 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        word_count = 0
+        for row in reader:
+            if "transcript" in row and row["transcript"]:
+                words = row["transcript"].split()
+                word_count += len(words)
+    stats["transcript_word_count"] = word_count
+
+    cleaned_transcripts = read_table(job_path(job_id, "cleaned_youtube_transcripts.arrow"), columns=["sentence"])
+    word_count = 0
+    for sentence in cleaned_transcripts["sentence"]:
+        if isinstance(sentence, str) and sentence:
+            word_count += len(sentence.split())
+    stats["cleaned_transcript_word_count"] = word_count
+
+    return stats
+
+# verdict lines written by the TLDR stage
+def load_tldr_lines(job_id):
+    try:
+        with open(job_path(job_id, "tldr_summary.txt"), "r", encoding="utf-8") as f:
+            raw_text = f.read()
+    except Exception as e:
+        print(f"TLDR failed: {e}")
+        raw_text = ""
+
+    return raw_text.split('\n')
+
+def build_results(product_name, job_id):
+    with open(job_path(job_id, "analyzed_sentiments.json"), "r") as f:
+        data = json.load(f)
+
+    aspect_scores = aspect_score_table(data)
+
+    positive_percentage, negative_percentage, neutral_percentage = sentiment_percentages(aspect_scores["score"])
+
+    # data for feature summary
+    feature_summary, feature_frequencies = process_feature_sentiments(aspect_scores, product_name)
+
+    # adjusted to strictly include feature summaries with 10+ mentions for data diversity
+    feature_summary = [fs for fs in feature_summary if feature_frequencies.get(fs["feature"], 0) >= 10]
+
+    emotion_data = load_emotion_data(job_id)
+
+    # emotion distributions and comments
+    emotion_distribution = process_emotion_distribution(emotion_data)
+    sentiment_distribution = process_sentiment_distribution(emotion_data)
+
+    sentiment_comments = get_sentiment_comments(emotion_data)
+    emotion_comments = get_emotion_comments(emotion_data)
+
+    # data for summaries
+    comment_summary, google_summary = load_summaries(job_id)
+
+    # data for comparison tool
+    comparison_data = load_comparison_data(job_id)
+    best_features_data = load_best_features(job_id)
+
+    # transcripts data
+    transcript_distributions = process_transcripts(job_id)
+    benefits_drawbacks = load_benefits_drawbacks(job_id)
+    keywords_dict = load_keywords(job_id)
+
+    data_statistics = calculate_stats(job_id)
+
+    tldr_lines = load_tldr_lines(job_id)
+
+    return {
+        "product_name": product_name,
+        "positive_percentage": positive_percentage,
+        "negative_percentage": negative_percentage,
+        "neutral_percentage": neutral_percentage,
+        "features": feature_summary,
+        "feature_frequencies": feature_frequencies,
+        "overall_emotion_distribution": emotion_distribution,
+        # "aspect_emotion_distribution": aspect_emotion_distribution,
+        "sentiment_distribution": sentiment_distribution,
+        "sentiment_comments": sentiment_comments,
+        "emotion_comments": emotion_comments,
+        "comment_summary": comment_summary,
+        "google_summary": google_summary,
+        "comparison_data": comparison_data,
+        "best_features": best_features_data,
+        "transcript_distributions": transcript_distributions,
+        "benefits_drawbacks": benefits_drawbacks,
+        "keywords_dict": keywords_dict,
+        "data_statistics": data_statistics,
+        "tldr_lines": tldr_lines
+    }
+
+# numpy numbers from the aggregations aren't json serializable
+def to_json_value(value):
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Can't serialize {type(value).__name__}")
+
+# stage entry point used by the pipeline graph
+def run(product_name, job_id=None):
+    results = build_results(product_name, job_id)
+
+    # written to a temp file then swapped in, so the endpoint never sends a half written document
+    results_file = job_path(job_id, "results.json")
+    temp_file = f"{results_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, default=to_json_value)
+    os.replace(temp_file, results_file)
+
+    print(f"Results built for {product_name}.")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("No product name given.")
+        sys.exit(1)
+
+    product_name = sys.argv[1]
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(product_name, job_id)
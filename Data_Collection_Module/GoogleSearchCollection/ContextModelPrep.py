@@ -1,20 +1,20 @@
 import os
 import re
+import sys
 import json
-import spacy
 from transformers import DebertaTokenizer
 
-# load SpaCy NLP for tokenization
-nlp = spacy.load("en_core_web_sm")  
-
 # load tokenizer
 # tokenizer = DebertaTokenizer.from_pretrained("microsoft/deberta-large")
 # REMOVED TOKENIZER - changed model in upcoming sentiment analysis, this is redundant
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from models import load_spacy
+from workspace import job_path
 
-texts_directory = os.path.join(script_dir, "../../inputs-outputs/sentiment_ready_texts")
-output_file = os.path.join(script_dir, "../../inputs-outputs/processed_dataset.json")
+# load SpaCy NLP for tokenization
+nlp = load_spacy()
 
 REMOVE_PATTERNS = [
     r"you are using an out of date browser.*?",
@@ -63,7 +63,8 @@ def split_sentences(text):
 
     return merge_sentences(sentences)
 
-def build_dataset():
+def build_dataset(job_id=None):
+    texts_directory = job_path(job_id, "sentiment_ready_texts")
     dataset = []
     
     for filename in os.listdir(texts_directory):
@@ -93,9 +94,12 @@ def build_dataset():
 
     return dataset
 
-if __name__ == "__main__":
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    output_file = job_path(job_id, "processed_dataset.json")
+
     # build and save the dataset
-    dataset = build_dataset()
+    dataset = build_dataset(job_id)
 
     try:
         with open(output_file, "w", encoding="utf-8") as f:
@@ -104,3 +108,7 @@ if __name__ == "__main__":
         print(f"Error opening file: {e}")
 
     print(f"Processed dataset successfully saved.")
+
+if __name__ == "__main__":
+    job_id = sys.argv[1] if len(sys.argv) > 1 else None
+    run(None, job_id)
@@ -1,18 +1,31 @@
 import os
 import sys
-import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-output_path = os.path.join(script_dir, "../../inputs-outputs/google_discussion_links.txt")
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from http_client import request
+from workspace import job_path
+
+RESULT_PAGES = 3
+SEARCH_DEADLINE = 15 # seconds per results page, retries included
 
 # "safe" scrapable discussion sites
 allowed_sites = ["techradar.com", "tomshardware.com", "macrumors.com", "forums.overclockers.co.uk", "www.engadget.com", "www.tomsguide.com", "www.overclockers.co.uk", "www.rtings.com"]
 
-def fetch_links(product_name):
+def fetch_page(endpoint, query, page):
+    try:
+        res = request("GET", endpoint, deadline=SEARCH_DEADLINE, params=query)
+        data = res.json()
+        return [item["link"] for item in data.get("items") or []]
+    except Exception as err:
+        print(f"Error raised on page {page + 1}: {err}")
+        return None
+
+def fetch_links(product_name, job_id=None):
     print(f"Searching for reviews and discussions on {product_name}")
 
     endpoint = "https://www.googleapis.com/customsearch/v1"
@@ -21,44 +34,38 @@ def fetch_links(product_name):
     # joining trusted sites together for the query
     site_filter = " OR ".join([f"site:{site}" for site in allowed_sites])
 
-    for page in range(3):
-        start = page * 10 + 1
-
-        # query construction
-        query = {"q": f"{product_name} review OR discussion OR forum ({site_filter})", "key": os.getenv("GOOGLE_SEARCH_API_KEY"), "cx": os.getenv("GOOGLE_SEARCH_ENGINE_ID"), "start": start, "num": 10}
-
-        try:
-            res = requests.get(endpoint, params=query, timeout=10)
-            data = res.json()
-
-            items = data.get("items")
-            if not items:
-                print(f"No results on page")
-                break
+    # query construction, one per results page
+    queries = [{"q": f"{product_name} review OR discussion OR forum ({site_filter})", "key": os.getenv("GOOGLE_SEARCH_API_KEY"), "cx": os.getenv("GOOGLE_SEARCH_ENGINE_ID"), "start": page * 10 + 1, "num": 10} for page in range(RESULT_PAGES)]
 
-            new_links = []
-            for item in items:
-                new_links.append(item["link"])
-            links.extend(new_links)
+    # pages requested at once instead of one after another with a sleep, the shared client retries rate limits
+    with ThreadPoolExecutor(max_workers=RESULT_PAGES) as executor:
+        pages = list(executor.map(fetch_page, [endpoint] * RESULT_PAGES, queries, range(RESULT_PAGES)))
 
-            print(f"Page {page + 1}: {len(new_links)} links found.")
-
-            time.sleep(0.5)  # avoiding rate limits and restrictions
-
-        except Exception as err:
-            print(f"Error raised: {err}")
+    # pages after an empty or failed one are dropped, same as stopping there
+    for page, new_links in enumerate(pages):
+        if not new_links:
+            print(f"No results on page")
             break
 
+        links.extend(new_links)
+        print(f"Page {page + 1}: {len(new_links)} links found.")
+
     # save the collected links to a file
+    output_path = job_path(job_id, "google_discussion_links.txt")
     with open(output_path, "w", encoding="utf-8") as out_file:
         for url in links:
             out_file.write(url + "\n")
     print(f"Sucessfully saved links to output file.")
 
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    fetch_links(product_name, job_id)
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Enter product name as a second parameter.")
         sys.exit(1)
 
     product = sys.argv[1]
-    fetch_links(product)
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(product, job_id)
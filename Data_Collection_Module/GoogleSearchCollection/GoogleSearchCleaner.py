@@ -1,13 +1,14 @@
 import os
 import re
-import spacy
-
-# SpaCY NLP model for sentence-level tokenization
-nlp = spacy.load("en_core_web_sm")
+import sys
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-input_directory = os.path.join(script_dir, "../../inputs-outputs/scraped_texts")
-output_directory = os.path.join(script_dir, "../../inputs-outputs/sentiment_ready_texts")
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from models import load_spacy
+from workspace import job_path
+
+# SpaCY NLP model for sentence-level tokenization
+nlp = load_spacy()
 
 NOISE_PATTERNS = [
     r"https?://\S+",  # remove URLs
@@ -42,7 +43,11 @@ def extract_sentences(text):
 
     return "\n".join(sentences)
 
-if __name__ == "__main__":
+def clean_files(job_id=None):
+    input_directory = job_path(job_id, "scraped_texts")
+    output_directory = job_path(job_id, "sentiment_ready_texts")
+    os.makedirs(output_directory, exist_ok=True)
+
     # process files
     for filename in os.listdir(input_directory):
         if filename.startswith('.') or not filename.endswith('.txt'): # fix for script reading DS_STORE
@@ -62,4 +67,12 @@ if __name__ == "__main__":
 
             print("Successfully cleaned sentences.")
         except Exception as err:
-            print(f"Error while cleaning: {err}")
\ No newline at end of file
+            print(f"Error while cleaning: {err}")
+
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    clean_files(job_id)
+
+if __name__ == "__main__":
+    job_id = sys.argv[1] if len(sys.argv) > 1 else None
+    run(None, job_id)
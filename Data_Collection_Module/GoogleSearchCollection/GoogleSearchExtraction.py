@@ -1,56 +1,159 @@
-import requests
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
 import os
+import sys
+import threading
 import time
 
 # paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
-links_file = os.path.join(script_dir, "../../inputs-outputs/google_discussion_links.txt")
-output_directory = os.path.join(script_dir, "../../inputs-outputs/scraped_texts")
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from http_client import request
+from page_cache import get_page, is_fresh, prune_pages, put_page, touch_page
+from workspace import job_path
+
+# pages are fetched in parallel so the scrape takes about as long as the slowest page instead of the sum of all of them
+MAX_WORKERS = 16
+PER_HOST_LIMIT = 2 # stay polite to forums that show up several times in the links
+REQUEST_TIMEOUT = 10
+SCRAPE_DEADLINE = 30 # seconds for the whole scrape, pages still loading after this are skipped
+PAGE_RETRIES = 1 # a page that times out or returns 429 / 5xx gets one more try if there's time left
+
+host_limits = {}
+host_limits_lock = threading.Lock()
+
+def host_limit(url):
+    host = urlparse(url).netloc.lower()
+    with host_limits_lock:
+        if host not in host_limits:
+            host_limits[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return host_limits[host]
+
+# strips a page down to the lines worth running sentiment on
+def clean_html(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    # clean out non-content tags with no sentiment value
+    for tag in soup.find_all(["script", "style", "footer", "header", "nav", "meta", "iframe", "aside"]):
+        tag.decompose()
+
+    text = soup.get_text(separator="\n")
+
+    # filter short / noisy lines and duplicate lines holding little sentiment value
+    lines = text.splitlines()
+    cleaned = []
+    seen = set()
+    
+    for line in lines:
+        line = line.strip()
+        if len(line) > 50 and line not in seen:
+            cleaned.append(line)
+            seen.add(line)
+
+    return "\n".join(cleaned)
+
+def extract_text(url, deadline=None):
+    # pages scraped recently come straight from the page cache, no download or parsing
+    cached = get_page(url)
+    if cached is not None and is_fresh(cached):
+        return cached["text"]
 
-def extract_text(url):
     # a random copied user-agent to bypass potential blocks, expand
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     }
 
+    # stale cached page, ask the site to only send it again if it has changed
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
     try:
-        res = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        # clean out non-content tags with no sentiment value
-        for tag in soup.find_all(["script", "style", "footer", "header", "nav", "meta", "iframe", "aside"]):
-            tag.decompose()
-
-        text = soup.get_text(separator="\n")
-
-        # filter short / noisy lines and duplicate lines holding little sentiment value
-        lines = text.splitlines()
-        cleaned = []
-        seen = set()
-        
-        for line in lines:
-            line = line.strip()
-            if len(line) > 50 and line not in seen:
-                cleaned.append(line)
-                seen.add(line)
-
-        return "\n".join(cleaned)
+        # pages queued behind a slow host give up at the scrape deadline instead of waiting for a slot
+        limit = host_limit(url)
+        wait_time = None if deadline is None else deadline - time.monotonic()
+        if (wait_time is not None and wait_time <= 0) or not limit.acquire(timeout=wait_time):
+            return cached["text"] if cached is not None else None
+
+        try:
+            # never wait on a page past the scrape deadline
+            timeout = REQUEST_TIMEOUT
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    return cached["text"] if cached is not None else None
+
+            # shared pooled client keeps connections to the same sites alive and retries inside the page's deadline
+            res = request("GET", url, deadline=timeout, retries=PAGE_RETRIES, headers=headers)
+        finally:
+            limit.release()
+
+        # pages finishing after the deadline were already skipped and the stage may have returned, leave the cache alone
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+
+        if res.status_code == 304 and cached is not None:
+            touch_page(url)
+            return cached["text"]
+
+        text = clean_html(res.text)
+
+        # error pages aren't cached so they get retried next time
+        if res.ok:
+            put_page(url, text, res.headers.get("ETag"), res.headers.get("Last-Modified"))
+
+        return text
     except Exception as e:
         print(f"Error extracting text: {e}")
-        return None
+        # an out of date page is better than nothing if the site is down
+        return cached["text"] if cached is not None else None
 
 # main scraping logic
-if __name__ == "__main__":
+def scrape_links(job_id=None):
+    links_file = job_path(job_id, "google_discussion_links.txt")
+    output_directory = job_path(job_id, "scraped_texts")
+    os.makedirs(output_directory, exist_ok=True)
+
     with open(links_file, "r", encoding="utf-8") as f:
         urls = f.read().splitlines()
 
-    for i, url in enumerate(urls):
-        extracted_text = extract_text(url)
+    prune_pages()
+
+    deadline = time.monotonic() + SCRAPE_DEADLINE
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="scrape")
+    pending = {executor.submit(extract_text, url, deadline): i for i, url in enumerate(urls) if url.strip()}
+
+    # write each page as soon as it arrives, site numbers still follow the link order
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
 
-        if extracted_text is None:
-            continue
+        done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            i = pending.pop(future)
+            extracted_text = future.result()
 
-        filename = os.path.join(output_directory, f"site_{i + 1}.txt") # fixed formatting to ensure site names are picked up
-        with open(filename, "w", encoding="utf-8") as out:
-            out.write(extracted_text)
+            if extracted_text is None:
+                continue
+
+            filename = os.path.join(output_directory, f"site_{i + 1}.txt") # fixed formatting to ensure site names are picked up
+            with open(filename, "w", encoding="utf-8") as out:
+                out.write(extracted_text)
+
+    if pending:
+        print(f"Scrape deadline reached, skipped {len(pending)} slow pages.")
+
+    # don't hold the stage up on pages that are still loading
+    executor.shutdown(wait=False, cancel_futures=True)
+
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    scrape_links(job_id)
+
+if __name__ == "__main__":
+    job_id = sys.argv[1] if len(sys.argv) > 1 else None
+    run(None, job_id)
@@ -1,9 +1,18 @@
 import os
 import sys
-import subprocess
-from progress_tracking import update_progress
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from pipeline import GOOGLE_STAGES
+from stage_graph import run_graph
+from workspace import create_job
+
+# runs just the Google branch of the pipeline graph by hand, the backend runs the whole graph itself
+def run(product_name, job_id=None):
+    # job id is passed down to every stage so they all read and write the same job folder
+    job_id = create_job(job_id) if job_id else None
+
+    return run_graph(GOOGLE_STAGES, product_name, job_id)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -11,17 +20,5 @@ if __name__ == "__main__":
         sys.exit(1)
     
     product_name = sys.argv[1]
-
-    # run GoogleSearch.py with product name
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/GoogleSearchCollection/GoogleSearch.py"), product_name])
-    update_progress("google", 20)
-
-    # run the rest of pipeline
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/GoogleSearchCollection/GoogleSearchExtraction.py")])
-    update_progress("google", 20)
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/GoogleSearchCollection/GoogleSearchCleaner.py")])
-    update_progress("google", 20)
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/GoogleSearchCollection/ContextModelPrep.py")])
-    update_progress("google", 20)
-    subprocess.run(["python3", os.path.join(script_dir, "../../AI_Module/GoogleABSA.py"), product_name])
-    update_progress("google", 20)
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(product_name, job_id)
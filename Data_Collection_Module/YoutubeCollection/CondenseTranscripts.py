@@ -1,12 +1,15 @@
 import os
+import sys
 import pandas as pd
 import re
-import nltk
-from nltk.tokenize import word_tokenize
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-input_file = os.path.join(script_dir, '../../inputs-outputs/youtube_transcripts.csv')
-output_file = os.path.join(script_dir, '../../inputs-outputs/condensed_transcripts.csv')
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from prompt_budget import truncate_to_tokens
+from workspace import job_path
+
+# tokens kept per transcript (about 600 words), counted with the llm's own tokenizer
+CONDENSED_TRANSCRIPT_TOKENS = 800
 
 def clean_text(text):
     patterns = [
@@ -25,7 +28,11 @@ def clean_text(text):
         text = re.sub(pattern, '', text, flags=re.IGNORECASE) # fixed some patterns not being applied
     return text
 
-if __name__ == "__main__":
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    input_file = job_path(job_id, "youtube_transcripts.csv")
+    output_file = job_path(job_id, "condensed_transcripts.csv")
+
     try:
         df = pd.read_csv(input_file)
     except:
@@ -37,10 +44,13 @@ if __name__ == "__main__":
         vid = row["video_id"]
         transcript = row.get("transcript", "")
         cleaned = clean_text(str(transcript))
-        tokens = word_tokenize(cleaned)
-        short_transcript = ' '.join(tokens[:600])  # max 600 word for token restrictions
+        short_transcript = truncate_to_tokens(cleaned, CONDENSED_TRANSCRIPT_TOKENS)
         short_transcripts.append({"video_id": vid, "text": short_transcript})
 
     output_csv = pd.DataFrame(short_transcripts)
     output_csv.to_csv(output_file, index=False)
     print("Transcripts shortened.")
+
+if __name__ == "__main__":
+    job_id = sys.argv[1] if len(sys.argv) > 1 else None
+    run(None, job_id)
@@ -1,135 +1,159 @@
 import os
+import sys
 import pandas as pd
-import json
 import re
-import spacy
-import torch
-from transformers import pipeline
 import emoji
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
-nlp = spacy.load("en_core_web_sm")
-device = torch.device("mps") # offload to MPS, change to CUDA if on colab
-
-# truncation true, fixed for overflowing
-sarcasm_model = pipeline("text-classification", model="cardiffnlp/twitter-roberta-base-irony", truncation=True, padding=True, max_length=256, device=device)
-emotion_model = pipeline("text-classification", model="cardiffnlp/bertweet-base-emotion", truncation=True, padding=True, max_length=512, device=device)
-
 script_dir = os.path.dirname(os.path.abspath(__file__))
-input_file = os.path.join(script_dir, "../../inputs-outputs/cleaned_youtube_comments.csv")
-output_file = os.path.join(script_dir, "../../inputs-outputs/processed_youtube_comments.csv")
-
-def run_sarcasm(text, sarcasm_model_pipeline):
-    if not text:
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from columnar import write_table
+from inference_cache import cached_outputs
+from models import EMOTION_MODEL, SARCASM_MODEL, load_emotion_pipeline, load_sarcasm_pipeline, load_spacy, model_version, run_length_bucketed
+from workspace import job_path
+
+# models come from the shared registry so the backend worker pool only loads them once
+nlp = load_spacy()
+sarcasm_model = load_sarcasm_pipeline()
+emotion_model = load_emotion_pipeline()
+
+# text the models can score, skips empty and missing (NaN) comments
+def is_scorable(text):
+    return isinstance(text, str) and bool(text.strip())
+
+# batched model outputs for every unique comment, comments seen on earlier runs come from the on-disk inference cache
+# a batch that fails falls back to one comment at a time so a single bad comment doesn't lose the whole batch
+def run_cached_batches(model_name, model_pipeline, texts, batch_size=32, **kwargs):
+    def infer(batch):
+        try:
+            return run_length_bucketed(model_pipeline, batch, batch_size, **kwargs)
+        except Exception:
+            outputs = []
+            for text in batch:
+                try:
+                    outputs.append(model_pipeline([text], **kwargs)[0])
+                except Exception:
+                    print(f"Error while processing text with {model_name}.")
+                    outputs.append(None)
+            return outputs
+
+    unique_texts = [text for text in dict.fromkeys(texts) if is_scorable(text)]
+    outputs = cached_outputs(model_name, model_version(model_name), unique_texts, infer)
+    return dict(zip(unique_texts, outputs))
+
+def is_sarcastic(result):
+    if not result:
         return False
 
-    results = sarcasm_model_pipeline([text])
-
-    if len(results) > 0:
-        label = results[0]["label"].upper()
-        score = float(results[0]["score"])
-        # if "IRONY" label is first then weigh score
-        if "IRONY" in label and score >= 0.99: # adjusted, this model returns high scores
-            return True
+    label = result["label"].upper()
+    score = float(result["score"])
+    # if "IRONY" label is first then weigh score
+    return "IRONY" in label and score >= 0.99 # adjusted, this model returns high scores
 
-    return False
+def get_sarcasm_flags(texts, sarcasm_model_pipeline, batch_size=32):
+    results = run_cached_batches(SARCASM_MODEL, sarcasm_model_pipeline, texts, batch_size)
+    return {text: is_sarcastic(result) for text, result in results.items()}
 
 # mapping model labels to actual emotions fixed
 # this model returns "LABEL_0, LABEL_1, etc..." from docs   
-def get_emotion_distribution(text, model):
-    if not text:
+def map_emotion_labels(distribution):
+    if not distribution:
         return None
 
-    try:
-        results = model([text], top_k=None) # top_k = none for all labels
+    distribution = sorted(distribution, key=lambda x: x["score"], reverse=True)
 
-        if not results:
-             print(f"Error processing emotion for: {text}")
-             return None
+    final_distribution = []
+    for item in distribution:
+        model_label = item['label']
+        score = item['score']
 
-        distribution = results[0]
-        distribution.sort(key=lambda x: x["score"], reverse=True)
+        label_string = model_label.split('_')[-1]
+        label_id = int(label_string)
 
-        final_distribution = []
-        for item in distribution:
-            model_label = item['label']
-            score = item['score']
+        id_map = {0: "anger", 1: "joy", 2: "optimism", 3: "sadness"}
+        string_label = id_map.get(label_id)
 
-            label_string = model_label.split('_')[-1]
-            label_id = int(label_string)
+        if string_label is None:
+            string_label = "unknown" # preventing breakages, fix for model outputs but may introduce bad results
 
-            id_map = {0: "anger", 1: "joy", 2: "optimism", 3: "sadness"}
-            string_label = id_map.get(label_id)
+        final_distribution.append({"label": string_label, "score": score})
 
-            if string_label is None:
-                string_label = "unknown" # preventing breakages, fix for model outputs but may introduce bad results
+    return final_distribution
 
-            final_distribution.append({"label": string_label, "score": score})
+# emotion distribution for each comment, top_k = none for all labels
+def get_emotion_distributions(texts, model, batch_size=32):
+    results = run_cached_batches(EMOTION_MODEL, model, texts, batch_size, top_k=None)
+    return [map_emotion_labels(results.get(text)) if is_scorable(text) else None for text in texts]
 
-        return final_distribution
-    except Exception as e:
-        print(f"Error while processing text with emotion model.")
+def sorted_emotions(emotions):
+    if emotions is None:
         return None
 
-def extract_tops(json_str, original_text="", sarcasm_model_pipeline=None):
-    try:
-        emotion_dict = json.loads(json_str)
-    except Exception:
+    return sorted(((item["label"], item["score"]) for item in emotions), key=lambda x: x[1], reverse=True)
+
+# added logic, if top 2 emotions are very close (10%) then resort to mixed
+def is_mixed(items):
+    return len(items) > 1 and abs(items[0][1] - items[1][1]) < 0.10
+
+# sarcasm only changes the result for comments that have a clear top emotion, the rest never need the sarcasm model
+def needs_sarcasm_check(emotions):
+    items = sorted_emotions(emotions)
+    return bool(items) and not is_mixed(items)
+
+def extract_tops(emotions, sarcastic=False):
+    items = sorted_emotions(emotions)
+    if not items:
         return ("unknown", 0.0, "neutral") # default return for breakages
 
     # extracting top emotion and score
-    items = sorted(emotion_dict.items(), key=lambda x: x[1], reverse=True)
     top_emotion, top_score = items[0][0], items[0][1]
 
-    # added logic, if top 2 emotions are very close (10%) then resort to mixed
-    if len(items) > 1:
-        second_emotion, second_score = items[1]
-        if abs(top_score - second_score) < 0.10:
-            return ("mixed", round(top_score, 4), "mixed")
+    if is_mixed(items):
+        return ("mixed", round(top_score, 4), "mixed")
 
     sentiment_map = {"joy": "positive", "optimism": "positive", "sadness": "negative", "anger": "negative", "mixed": "mixed", "sarcasm": "negative"}
     final_sentiment = sentiment_map.get(top_emotion, "neutral") # neutral default fix
 
     # sarcasm section
-    is_sarcastic = run_sarcasm(original_text, sarcasm_model_pipeline)
-    if is_sarcastic:
+    if sarcastic:
         final_sentiment = "negative"
         top_emotion = "sarcasm"
 
     return (top_emotion, round(top_score, 4), final_sentiment)
 
-# quick conversion into json for cell added for handling
+# rounded label / score pairs for the cell, stored as a native list column instead of a json string
 def format_data(emotion_list):
     data = {}
-    for item in emotion_list:
+    for item in emotion_list or []:
         if "label" in item and "score" in item:
             data[item["label"]] = round(item["score"], 4)
-    return json.dumps(data)
+    return [{"label": label, "score": score} for label, score in data.items()]
+
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    input_file = job_path(job_id, "cleaned_youtube_comments.csv")
+    output_file = job_path(job_id, "processed_youtube_comments.arrow")
 
-if __name__ == "__main__":
     try:
         df = pd.read_csv(input_file)
     except Exception as e:
         print(f"Error loading file: {e}")
 
     print("Running emotion analysis on comments") # debug
-    emotion_results = []
-    for comment in df["cleaned_comment"]:
-        emotion_distribution = get_emotion_distribution(comment, emotion_model)
-        formatted = format_data(emotion_distribution)
-        emotion_results.append(formatted)
+    comments = df["cleaned_comment"].tolist()
+    emotion_distributions = get_emotion_distributions(comments, emotion_model)
+    df["emotion_analysis"] = [format_data(distribution) for distribution in emotion_distributions]
 
-    df["emotion_analysis"] = emotion_results
+    # second batched pass with the sarcasm model, only over comments whose result it can change
+    sarcasm_candidates = [comment for comment, emotions in zip(comments, df["emotion_analysis"]) if needs_sarcasm_check(emotions)]
+    sarcasm_flags = get_sarcasm_flags(sarcasm_candidates, sarcasm_model)
 
     top_emotions = []
     emotion_scores = []
     sentiments = []
 
-    for i in range(len(df)):
-        emotion_json = df.loc[i, "emotion_analysis"] # fixed cells not selecting
-        original_text = df.loc[i, "cleaned_comment"]
-
-        top_emotion, score, sentiment = extract_tops(emotion_json, original_text=original_text, sarcasm_model_pipeline=sarcasm_model)
+    for comment, emotions in zip(comments, df["emotion_analysis"]):
+        top_emotion, score, sentiment = extract_tops(emotions, sarcastic=sarcasm_flags.get(comment, False))
 
         top_emotions.append(top_emotion)
         emotion_scores.append(score)
@@ -140,6 +164,9 @@ if __name__ == "__main__":
     df["emotion_score"] = emotion_scores
     df["sentiment"] = sentiments
 
-    df.to_csv(output_file, index=False)
+    write_table(df, output_file)
     print(f"Emotion analysis complete on comments.")
 
+if __name__ == "__main__":
+    job_id = sys.argv[1] if len(sys.argv) > 1 else None
+    run(None, job_id)
@@ -1,46 +1,25 @@
-from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
-import subprocess
-
-from progress_tracking import update_progress
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from pipeline import YOUTUBE_STAGES
+from stage_graph import run_graph
+from workspace import create_job
 
-def run_comments(product_name):
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/YoutubeCollection/YoutubeSearchCommentCleaner.py"), product_name])
-    update_progress("youtube", 15)
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/YoutubeCollection/PrepComments.py")])
-    update_progress("youtube", 15)
-
-def run_transcripts():
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/YoutubeCollection/PrepTranscripts.py")])
-    update_progress("youtube", 15)
-    subprocess.run(["python3", os.path.join(script_dir, "../../AI_Module/TranscriptABSA.py")])
-    update_progress("youtube", 15)
+# runs just the YouTube branch of the pipeline graph by hand, the backend runs the whole graph itself
+# the comment, transcript and transcript LLM chains all start as soon as the search is done
+def run(product_name, job_id=None):
+    # job id is passed down to every stage so they all read and write the same job folder
+    job_id = create_job(job_id) if job_id else None
 
-def run_LLM(product_name):
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/YoutubeCollection/CondenseTranscripts.py")])
-    update_progress("youtube", 15)
-    subprocess.run(["python3", os.path.join(script_dir, "../../AI_Module/TranscriptLLM.py"), product_name])
-    update_progress("youtube", 15)
+    return run_graph(YOUTUBE_STAGES, product_name, job_id)
 
-# changed to processes running in parralel like backend, speed improvements
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("No product name given.")
         sys.exit(1)
     
     product_name = sys.argv[1]
-
-    subprocess.run(["python3", os.path.join(script_dir, "../../Data_Collection_Module/YoutubeCollection/YoutubeSearch.py"), product_name])
-    update_progress("youtube", 10)
-
-    with ThreadPoolExecutor() as executor:
-        future1 = executor.submit(run_comments, product_name)
-        future2 = executor.submit(run_transcripts)
-        future3 = executor.submit(run_LLM, product_name)
-
-        future1.result()
-        future2.result()
-        future3.result()
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(product_name, job_id)
@@ -1,7 +1,12 @@
 import os
 import sys
 import pandas as pd
+import threading
 import time
+import httplib2
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled
@@ -9,17 +14,63 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# youtube client
-youtube = build("youtube", "v3", developerKey=os.getenv("YOUTUBE_SEARCH_API_KEY"))
-
 script_dir = os.path.dirname(os.path.abspath(__file__))
-comments_file = os.path.join(script_dir, "../../inputs-outputs/youtube_comments.csv")
-transcripts_file = os.path.join(script_dir, "../../inputs-outputs/youtube_transcripts.csv")
+sys.path.append(os.path.join(script_dir, "../../Shared_Module"))
+from http_client import HTTP_RETRIES
+from rate_limiter import TokenBucket
+from workspace import job_path
+
+# every video's transcript and comments are fetched in parallel, data api calls go through a token bucket of requests
+# shared by all jobs in the process, so parallel searches stay under the request rate together
+# the daily quota itself is only known to the api, once it answers quotaExceeded every call is skipped until the quota
+# resets at midnight pacific time instead of failing one by one
+MAX_WORKERS = 16
+YOUTUBE_REQUESTS_PER_SECOND = float(os.getenv("YOUTUBE_REQUESTS_PER_SECOND", "10"))
+REQUEST_WAIT = 60 # longest a call waits for a request slot before giving up
+YOUTUBE_TIMEOUT = 15 # seconds per data api call, 429 / 5xx responses are retried HTTP_RETRIES times with backoff
+QUOTA_RESET_ZONE = ZoneInfo("America/Los_Angeles")
+
+youtube_requests = TokenBucket(rate=YOUTUBE_REQUESTS_PER_SECOND, capacity=YOUTUBE_REQUESTS_PER_SECOND) # replaces the sleep between pages
+quota_exhausted_until = 0 # unix time the daily quota resets at, once the api has said it's used up
+
+_clients = threading.local()
+
+def get_youtube_client():
+    # the underlying http client isn't thread safe, each fetching thread builds its own
+    if getattr(_clients, "youtube", None) is None:
+        _clients.youtube = build("youtube", "v3", developerKey=os.getenv("YOUTUBE_SEARCH_API_KEY"), http=httplib2.Http(timeout=YOUTUBE_TIMEOUT))
+    return _clients.youtube
+
+def acquire_request():
+    if time.time() < quota_exhausted_until:
+        print("YouTube API daily quota used up, skipping call until it resets.")
+        return False
+
+    if not youtube_requests.acquire(1, timeout=REQUEST_WAIT):
+        print("YouTube API request rate limit reached, skipping call.")
+        return False
+    return True
+
+def next_quota_reset():
+    now = datetime.now(QUOTA_RESET_ZONE)
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+# a 403 quotaExceeded (or the older dailyLimitExceeded) means no more calls will work today
+def check_quota_error(error):
+    global quota_exhausted_until
+    if isinstance(error, HttpError) and error.resp.status == 403:
+        content = error.content.decode("utf-8", "ignore") if isinstance(error.content, bytes) else str(error.content)
+        if "quotaExceeded" in content or "dailyLimitExceeded" in content:
+            quota_exhausted_until = next_quota_reset()
+            print("YouTube API daily quota used up, skipping calls until it resets.")
 
 # initial call to retrieve the videos
-def find_videos(query):
+def find_videos(youtube, query):
+    if not acquire_request():
+        return [], []
+
     try:
-        search_response = youtube.search().list(q=query, part="id,snippet", type="video", maxResults=20, order="relevance").execute()
+        search_response = youtube.search().list(q=query, part="id,snippet", type="video", maxResults=20, order="relevance").execute(num_retries=HTTP_RETRIES)
 
         video_data = []
         video_ids = []
@@ -32,22 +83,25 @@ def find_videos(query):
         
         return video_data, video_ids
     except Exception as e:
+        check_quota_error(e)
         print(f"Error retrieving YouTube videos: {e}")
         return [], []
 
-# secondary calls to retrieve transcripts / comments for each video
-def get_comments_transcipts(video_id, max_comments=100):
-    transcript = None
-    comments = []
-
+# secondary calls to retrieve transcripts / comments for each video, ran in parallel for every video
+def get_transcript(video_id):
     # changed from required transcript to optional, some videos disable transcripts (break prevention)
     try:
         transcript = YouTubeTranscriptApi.get_transcript(video_id)
-        transcript = " ".join([entry["text"] for entry in transcript])
+        return " ".join([entry["text"] for entry in transcript])
     except TranscriptsDisabled:
         print(f"Transcript error from API, no transcript available.")
     except Exception as e:
         print(f"Error fetching transcript: {e}")
+    return None
+
+def get_comments(video_id, max_comments=100):
+    comments = []
+    youtube = get_youtube_client()
 
     # fetch comments
     try:
@@ -56,8 +110,11 @@ def get_comments_transcipts(video_id, max_comments=100):
 
         # 100 comments per call
         while comments_fetched < max_comments:
+            if not acquire_request():
+                break
+
             request = youtube.commentThreads().list(part="snippet", videoId=video_id, maxResults=min(100, max_comments - comments_fetched), textFormat="plainText", pageToken=next_page_token)
-            response = request.execute()
+            response = request.execute(num_retries=HTTP_RETRIES)
 
             # from doc
             for item in response.get("items", []):
@@ -75,31 +132,32 @@ def get_comments_transcipts(video_id, max_comments=100):
             next_page_token = response.get("nextPageToken")
             if not next_page_token:
                 break
-
-            time.sleep(0.5)  # adjustable for API rate limits
     except Exception as e:
+        check_quota_error(e)
         print(f"Error fetching comments for video: {e}")
 
-    return transcript, comments
+    return comments
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Enter a product name as a second argument.'")
-        sys.exit(1)
+# stage entry point used by RunAll and the backend worker pool
+def run(product_name, job_id=None):
+    comments_file = job_path(job_id, "youtube_comments.csv")
+    transcripts_file = job_path(job_id, "youtube_transcripts.csv")
 
-    product_name = sys.argv[1] + " Review"
-    videos, video_ids = find_videos(product_name)
+    videos, video_ids = find_videos(get_youtube_client(), product_name + " Review")
 
-    # fixed to fetch both in 1 call to preserve API calls
+    # transcripts and comments for all videos at once, results are collected in video order
     all_transcripts = []
     all_comments = []
-    
-    for video in videos:
-        transcript, comments = get_comments_transcipts(video["video_id"])
-        
-        if transcript:
-            all_transcripts.append({"video_id": video["video_id"], "title": video["title"], "transcript": transcript})
-        all_comments.extend(comments)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="youtube") as executor:
+        transcript_futures = [executor.submit(get_transcript, video["video_id"]) for video in videos]
+        comment_futures = [executor.submit(get_comments, video["video_id"]) for video in videos]
+
+        for video, transcript_future, comment_future in zip(videos, transcript_futures, comment_futures):
+            transcript = transcript_future.result()
+            if transcript:
+                all_transcripts.append({"video_id": video["video_id"], "title": video["title"], "transcript": transcript})
+            all_comments.extend(comment_future.result())
 
     df_comments = pd.DataFrame(all_comments)
     df_transcripts = pd.DataFrame(all_transcripts)
@@ -108,3 +166,12 @@ if __name__ == "__main__":
     print("YouTube comments saved successfully.")
     df_transcripts.to_csv(transcripts_file, index=False)
     print("YouTube transcripts saved successfully.")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Enter a product name as a second argument.'")
+        sys.exit(1)
+
+    product_name = sys.argv[1]
+    job_id = sys.argv[2] if len(sys.argv) > 2 else None
+    run(product_name, job_id)
@@ -0,0 +1,352 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import deque
+from workspace import cache_path
+
+# single aspect taxonomy shared by GoogleABSA, the comment cleaner and transcript prep (used to be 3 separate copies)
+# keywords are compiled once into one Aho-Corasick automaton, so finding every category in a text is a single pass
+# over its characters instead of a scan per keyword
+
+TECH_ASPECTS = {
+    # Display & Screen
+    "display": [
+        "screen", "display", "brightness", "peak brightness", "contrast", "contrast ratio",
+        "resolution", "refresh rate", "color accuracy", "HDR", "glare", "touchscreen",
+        "OLED", "LCD", "Mini LED", "MicroLED", "AMOLED", "viewing angles", "screen size",
+        "pixel density", "aspect ratio", "curved display", "ambient light sensor",
+        "anti-reflective", "blue light filter", "flicker-free", "matte finish", "edge-to-edge",
+        "in-cell touch", "dual display", "3D display", "nit", "nits"
+    ],
+
+    # Performance
+    "performance": [
+        "performance","speed", "lag", "efficiency", "responsiveness", "multitasking", "processing power",
+        "CPU", "GPU", "RAM", "thermal performance", "overheating", "frame rate",
+        "rendering speed", "benchmark scores", "clock speed", "turbo boost", "core count",
+        "hyper-threading", "instruction throughput", "latency", "parallel processing",
+        "system responsiveness", "bottleneck", "real-time performance", "performance mode"
+    ],
+
+    # Battery & Power Management
+    "battery": [
+        "battery", "battery life", "charge time", "power consumption", "fast charging",
+        "wireless charging", "battery drain", "energy efficiency", "wattage", "power adapter",
+        "battery capacity", "battery degradation", "battery cycle count", "removable battery",
+        "charging efficiency", "battery backup", "endurance", "battery health",
+        "charging port", "wired charging", "power brick", "power cable", "quick charge",
+        "lasted", "longer battery", "power-saving mode", "power saver",
+        "battery drain", "battery optimization", "battery longevity", "power backup",
+        "battery endurance", "battery usage", "battery saver feature", "quick battery drain",
+        "long-lasting charge", "overnight battery life", "slow discharge"
+    ],
+
+    # Storage & SSD
+    "storage": [
+        "SSD", "HDD", "storage capacity", "read speed", "write speed", "load times",
+        "expandable storage", "NVMe", "PCIe", "external storage", "SD card",
+        "flash memory", "eMMC", "UFS", "HFS+", "file system performance",
+        "SATA", "RAID configuration", "disk encryption"
+    ],
+
+    # Connectivity & Ports
+    "ports": [
+        "USB", "USB 2.0", "USB 3.0", "USB-C", "Thunderbolt", "HDMI", "Ethernet", "SD card reader",
+        "audio jack", "Wi-Fi", "Bluetooth", "5G", "LTE", "NFC", "Wi-Fi 6", "Wi-Fi 7",
+        "network connectivity", "dongle", "VGA", "DisplayPort", "DVI", "microSD slot", "FireWire",
+        "MHL", "Mini DisplayPort", "SIM card slot", "RJ45 port"
+    ],
+
+    # Keyboard
+    "keyboard": [
+        "key travel", "key feel", "backlit keyboard", "mechanical switches", "RGB lighting",
+        "typing experience", "keyboard layout", "macro keys", "numpad", "scissor switches",
+        "chiclet keys", "water-resistant keyboard", "ergonomic design", "key rollover",
+        "anti-ghosting", "hot-swappable keys", "programmable macros"
+    ],
+
+    # Trackpad & Mouse Input
+    "trackpad": [
+        "touchpad", "trackpad sensitivity", "multi-touch gestures", "palm rejection",
+        "haptic feedback", "scrolling experience", "precision tracking", "force touch",
+        "gesture recognition", "trackpoint"
+    ],
+
+    # Audio & Sound System
+    "audio": [
+        "sound", "speaker", "sound quality", "volume", "bass", "treble", "microphone",
+        "noise cancellation", "Dolby Atmos", "spatial audio", "headphone jack",
+        "bluetooth audio latency", "wireless earbuds support", "audio codec", "sound clarity",
+        "frequency response", "balanced audio", "amplifier", "subwoofer", "stereo separation",
+        "surround sound"
+    ],
+
+    # Design & Build Quality
+    "design": [
+        "design", "build quality", "materials", "aesthetics", "weight", "thickness", "durability",
+        "hinge strength", "bezel", "chassis", "color options", "portability", "carbon fiber",
+        "aluminum body", "plastic chassis", "sleek design", "ergonomic design", "form factor",
+        "curved design", "industrial design", "finish", "texture", "back cover design",
+        "sturdiness", "premium feel", "waterproof rating", "dust resistance"
+    ],
+
+    # Software & User Experience
+    "software": [
+        "software", "operating system", "pre-installed apps", "UI", "UX", "bloatware", "customization",
+        "dark mode", "gesture controls", "voice assistant", "AI features", "Windows 11",
+        "macOS", "Linux", "ChromeOS", "software updates", "firmware", "OS stability",
+        "driver support", "security patches", "app ecosystem", "multitasking support",
+        "interface design", "virtual assistant integration", "app store availability"
+    ],
+
+    # Cooling & Thermal Management
+    "cooling": [
+        "cooling","overheating", "fan noise", "heat dissipation", "thermal throttling",
+        "liquid cooling", "airflow", "heat pipes", "cooling pad", "vapor chamber",
+        "active cooling", "passive cooling", "temperature control", "thermal design power",
+        "fan placement", "fan control software"
+    ],
+
+    # Camera & Imaging
+    "camera": [
+        "camera","webcam", "camera resolution", "low-light performance", "autofocus",
+        "video quality", "megapixels", "Face ID", "portrait mode", "ultrawide",
+        "zoom", "optical image stabilization", "night mode", "depth sensor", "macro capability",
+        "color reproduction", "HDR video", "sensor size", "aperture", "white balance",
+        "wide-angle lens", "telephoto lens", "4K recording", "8K recording"
+    ],
+
+    # Security & Privacy
+    "security": [
+        "security", "fingerprint scanner", "Windows Hello", "privacy shutter", "TPM chip",
+        "encryption", "secure boot", "face recognition", "iris scanner", "biometric security",
+        "two-factor authentication", "password protection", "data encryption",
+        "firewall settings", "VPN integration", "antivirus compatibility"
+    ],
+
+    # Gaming & Graphics
+    "gaming": [
+        "gaming","ray tracing", "FPS", "VR gaming", "G-Sync", "FreeSync", "input lag",
+        "graphics card", "RGB lighting", "game compatibility", "frame rate consistency",
+        "latency", "anti-aliasing", "shader performance", "gaming benchmarks",
+        "VRR (Variable Refresh Rate)", "DLSS", "FSR (FidelityFX Super Resolution)"
+    ],
+
+    # Accessories & Expansion
+    "accessories": [
+        "accessories","stylus", "pen support", "dock", "external GPU", "external monitor", "VR headset",
+        "gaming controller", "webcam cover", "wireless charger", "case", "screen protector",
+        "portable charger", "headphone stand", "adapter", "cable management",
+        "portable docking station", "keyboard cover", "kickstand", "car mount"
+    ],
+
+    # Mobile-Specific Features
+    "mobile": [
+        "mobile","SIM", "dual SIM", "eSIM", "fast charging", "camera bump", "screen notch",
+        "water resistance", "5G connectivity", "foldable display", "biometric sensors",
+        "accelerometer", "gyroscope", "compass", "proximity sensor", "GPS", "magnetic sensor",
+        "removable battery", "removable back cover", "wireless power share"
+    ],
+
+    # AI or Smart Features
+    "AI_Features": [
+        "AI", "machine learning", "AI upscaling", "chatbot", "predictive text",
+        "smart home integration", "automation", "voice recognition", "natural language processing",
+        "personal assistant", "recommendation system", "adaptive learning", "context-aware computing",
+        "image recognition", "AI-based noise cancellation", "intelligent scene detection"
+    ],
+
+    # Cloud & Subscription Services
+    "cloud_Services": [
+        "cloud storage", "OneDrive", "Google Drive", "iCloud", "Dropbox", "streaming services",
+        "gaming cloud", "remote desktop", "cloud backup", "SaaS", "PaaS", "IaaS",
+        "subscription model", "licensing fees", "cloud sync", "cloud gaming platform"
+    ],
+
+    # Reliability & Longevity
+    "reliability": [
+        "reliability","long-term performance", "warranty", "customer support", "firmware updates",
+        "repairability", "modularity", "build durability", "consistency", "stability",
+        "upgradability", "error rate", "mean time between failures", "service plans",
+        "extended warranty", "mean time to repair", "hinge"
+    ],
+
+    # Sustainability & Environmental Impact
+    "sustainability": [
+        "sustainability", "energy star rating", "power efficiency", "recyclable materials",
+        "eco-friendly packaging", "carbon footprint", "green certifications",
+        "EPEAT rating", "renewable materials", "recycled plastics"
+    ],
+
+    # Maintenance & Support
+    "maintenance_support": [
+        "software patches", "driver updates", "tech support", "online help resources",
+        "user manual clarity", "replacement parts availability", "official repair centers",
+        "third-party repair", "customer service responsiveness", "remote troubleshooting"
+    ],
+}
+
+PRICING_TERMS = [
+    "expensive", "price", "cost", "worth", "value for money", "too costly",
+    "cheap", "budget", "overpriced", "reasonable price", "high cost", "cost-effective",
+    "premium pricing", "mid-range price", "low cost", "discounted price", "fair deal",
+    "money's worth", "not worth it", "steep price", "over-the-top pricing"
+]
+
+# bump when the automaton layout changes so old disk caches are ignored
+MATCHER_VERSION = 1
+
+def is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+# simple plural forms so "displays", "speakers" and "batteries" still hit their keyword as whole words
+def keyword_variants(keyword):
+    variants = [keyword]
+    if keyword[-1].isalpha():
+        variants.append(keyword + "s")
+        if keyword.endswith(("s", "x", "z", "ch", "sh")):
+            variants.append(keyword + "es")
+        if keyword.endswith("y") and len(keyword) > 1 and keyword[-2] not in "aeiou":
+            variants.append(keyword[:-1] + "ies")
+    return variants
+
+# lower casing some unicode characters changes the string length, keep offsets lined up with the original text
+def lower_text(text):
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+    return lowered
+
+class AspectMatcher:
+    def __init__(self, taxonomy):
+        self.categories = list(taxonomy.keys())
+        # goto[state] maps a character to the next state, outputs[state] holds (pattern length, category index, boundary flags)
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+
+        for category_index, keywords in enumerate(taxonomy.values()):
+            for keyword in keywords:
+                keyword = keyword.lower().strip()
+                if not keyword:
+                    continue
+                for variant in keyword_variants(keyword):
+                    self.add_pattern(variant, category_index)
+
+        self.build_fail_links()
+
+    def add_pattern(self, pattern, category_index):
+        state = 0
+        for ch in pattern:
+            if ch not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.goto[state][ch] = len(self.goto) - 1
+            state = self.goto[state][ch]
+
+        # only check a word boundary on the sides where the keyword itself starts / ends with a word character
+        output = (len(pattern), category_index, is_word_char(pattern[0]), is_word_char(pattern[-1]))
+        if output not in self.outputs[state]:
+            self.outputs[state].append(output)
+
+    # breadth first so a state's fail link is always set before its children need it, root children fail to the root
+    def build_fail_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+
+                # a state also emits every keyword that ends at its fail state
+                for output in self.outputs[self.fail[next_state]]:
+                    if output not in self.outputs[next_state]:
+                        self.outputs[next_state].append(output)
+
+    # every whole-word keyword hit in the text as (start, end, category), in order of where they end
+    def find(self, text):
+        if not text:
+            return []
+
+        lowered = lower_text(text)
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+
+        hits = []
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for length, category_index, check_start, check_end in outputs[state]:
+                start = i - length + 1
+                end = i + 1
+                if check_start and start > 0 and is_word_char(lowered[start - 1]):
+                    continue
+                if check_end and end < len(lowered) and is_word_char(lowered[end]):
+                    continue
+                hits.append((start, end, self.categories[category_index]))
+
+        return hits
+
+    # unique categories found in the text, in taxonomy order
+    def categories_in(self, text):
+        found = {category for _, _, category in self.find(text)}
+        return [category for category in self.categories if category in found]
+
+    # first hit of each category, used to centre the aspect snippet window
+    def first_positions(self, text):
+        positions = {}
+        for start, end, category in sorted(self.find(text)):
+            if category not in positions:
+                positions[category] = (start, end)
+        return positions
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+def taxonomy_key(taxonomy):
+    raw = json.dumps({"version": MATCHER_VERSION, "taxonomy": taxonomy}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+# compiled matcher for a taxonomy, cached in memory and pickled to disk so later processes skip compiling
+def get_matcher(taxonomy=None):
+    if taxonomy is None:
+        taxonomy = TECH_ASPECTS
+
+    key = taxonomy_key(taxonomy)
+
+    with _matchers_lock:
+        if key in _matchers:
+            return _matchers[key]
+
+        cache_file = cache_path("aspect_matchers", f"{key}.pkl")
+        matcher = None
+
+        if os.path.isfile(cache_file):
+            try:
+                with open(cache_file, "rb") as f:
+                    matcher = pickle.load(f)
+            except Exception as e:
+                print(f"Ignoring unreadable matcher cache: {e}")
+
+        if matcher is None:
+            matcher = AspectMatcher(taxonomy)
+            try:
+                # write to a temp file first so a concurrent reader never sees half a pickle
+                temp_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(temp_file, "wb") as f:
+                    pickle.dump(matcher, f)
+                os.replace(temp_file, cache_file)
+            except Exception as e:
+                print(f"Could not cache aspect matcher: {e}")
+
+        _matchers[key] = matcher
+        return matcher
@@ -0,0 +1,19 @@
+import os
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# tables passed between stages with nested cells (emotion scores, aspect lists, aspect sentiments) are stored as
+# Arrow IPC (feather) files instead of csv, nested cells are kept as native list / struct columns so nothing is
+# re-parsed with json.loads or ast.literal_eval, and readers memory-map the file instead of parsing text
+
+def write_table(df, file_path):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # written uncompressed so readers can memory-map it without copying, swapped in whole like the other outputs
+    temp_file = f"{file_path}.tmp"
+    feather.write_feather(table, temp_file, compression="uncompressed")
+    os.replace(temp_file, file_path)
+
+# columns limits what gets read, list / struct cells come back as arrays of values / dicts
+def read_table(file_path, columns=None):
+    return feather.read_table(file_path, columns=columns, memory_map=True).to_pandas()
@@ -0,0 +1,137 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# one client layer for every call to an external API (google search, scraped sites, perplexity, openai)
+# each call gets a deadline for all its attempts together, failed attempts that are worth retrying (timeouts,
+# dropped connections, 429 / 5xx) are retried with jittered exponential backoff inside that deadline, and slow calls
+# can be hedged, a duplicate is sent if the first hasn't answered after hedge_after seconds and whichever finishes
+# first wins, so one slow provider response doesn't hold up the whole job
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+
+# backoff before retry n is a random wait up to min(BACKOFF_CAP, BACKOFF_BASE * 2^n) (full jitter)
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8
+
+# connect timeout of each attempt, the read timeout is whatever is left of the deadline
+CONNECT_TIMEOUT = 5
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# llm calls (openai, perplexity) are slow, a duplicate costs a second completion so hedging is off unless set
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE_SECONDS", "90"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER_SECONDS")) if os.getenv("LLM_HEDGE_AFTER_SECONDS") else None
+
+_session_lock = threading.Lock()
+_session = None
+
+# duplicate requests run here, the losing request finishes in the background (it can't be cancelled)
+hedge_pool = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="hedge")
+
+# one pooled session for the whole process so connections to the same hosts are kept alive and reused
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+class RetryableStatus(requests.HTTPError):
+    pass
+
+def retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def backoff(attempt, error):
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    # rate limited responses say how long to wait
+    wait_time = retry_after(error)
+    return max(delay, wait_time) if wait_time is not None else delay
+
+def is_retryable_request_error(error):
+    if isinstance(error, RetryableStatus):
+        return True
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+# runs call(timeout) and a duplicate once hedge_after seconds pass without an answer, first success wins
+def hedged_call(call, timeout, hedge_after):
+    started = time.monotonic()
+    pending = {hedge_pool.submit(call, timeout)}
+
+    done, _ = wait(pending, timeout=hedge_after)
+    if not done:
+        pending.add(hedge_pool.submit(call, max(timeout - (time.monotonic() - started), 0.1)))
+
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+
+    raise error
+
+# call takes the seconds left for this attempt and either returns a result or raises
+# retryable decides which errors are worth another attempt, everything else is raised straight away
+def call_with_policy(call, deadline=30, retries=HTTP_RETRIES, retryable=is_retryable_request_error, hedge_after=None, name="Request"):
+    end = time.monotonic() + deadline
+
+    for attempt in range(retries + 1):
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"{name} ran past its {deadline}s deadline.")
+
+        try:
+            if hedge_after is not None and hedge_after < remaining:
+                return hedged_call(call, remaining, hedge_after)
+            return call(remaining)
+        except Exception as e:
+            if attempt == retries or not retryable(e):
+                raise
+
+            delay = backoff(attempt, e)
+            if time.monotonic() + delay >= end:
+                raise
+
+            print(f"{name} failed ({e}), retrying in {delay:.1f}s.")
+            time.sleep(delay)
+
+# requests style call through the shared session, 429 / 5xx responses are retried, other responses are returned as is
+def request(method, url, deadline=30, retries=HTTP_RETRIES, hedge_after=None, **kwargs):
+    def attempt(timeout):
+        response = get_session().request(method, url, timeout=(min(CONNECT_TIMEOUT, timeout), timeout), **kwargs)
+        if response.status_code in RETRY_STATUSES:
+            raise RetryableStatus(f"{response.status_code} from {url}", response=response)
+        return response
+
+    return call_with_policy(attempt, deadline, retries, hedge_after=hedge_after, name=f"{method} {url.split('?')[0]}")
+
+def is_retryable_openai_error(error):
+    import openai
+    return isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError))
+
+# chat completion through a module's own openai client, the sdk's own retries are turned off so the deadline covers
+# every attempt, kwargs go straight to chat.completions.create
+def chat_completion(client, deadline=LLM_DEADLINE, retries=HTTP_RETRIES, hedge_after=LLM_HEDGE_AFTER, **kwargs):
+    def attempt(timeout):
+        return client.with_options(timeout=timeout, max_retries=0).chat.completions.create(**kwargs)
+
+    return call_with_policy(attempt, deadline, retries, retryable=is_retryable_openai_error, hedge_after=hedge_after, name=f"OpenAI {kwargs.get('model')}")
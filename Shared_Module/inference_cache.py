@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import time
+
+from sqlite_cache import SqliteCache
+
+# on-disk cache of model outputs shared by every run, popular products get re-analyzed often and most of the same
+# forum sentences and comments come back each time, so a re-run on mostly unchanged data skips almost all inference
+# rows are keyed by model, model version and a hash of the input, least recently used rows are evicted past the size limit
+
+INFERENCE_CACHE_ENABLED = os.getenv("INFERENCE_CACHE_ENABLED", "1") != "0"
+INFERENCE_CACHE_MAX_MB = float(os.getenv("INFERENCE_CACHE_MAX_MB", "512"))
+
+cache = SqliteCache("inference_cache.sqlite3", [
+    """
+    CREATE TABLE IF NOT EXISTS outputs (
+        model TEXT NOT NULL,
+        version TEXT NOT NULL,
+        input_hash TEXT NOT NULL,
+        output TEXT NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (model, version, input_hash)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS outputs_last_used ON outputs (last_used)",
+], table="outputs", max_mb=INFERENCE_CACHE_MAX_MB, name="Inference cache")
+
+def content_hash(value):
+    # inputs that aren't plain text (e.g. sentence plus candidate labels) are hashed as json
+    payload = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_outputs(model, version, input_hashes):
+    if not INFERENCE_CACHE_ENABLED or not input_hashes:
+        return {}
+
+    connection = cache.connection()
+    found = {}
+    unique_hashes = list(dict.fromkeys(input_hashes))
+
+    # chunked to stay under sqlite's limit on query parameters
+    for start in range(0, len(unique_hashes), 500):
+        chunk = unique_hashes[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = connection.execute(
+            f"SELECT input_hash, output FROM outputs WHERE model = ? AND version = ? AND input_hash IN ({placeholders})",
+            [model, version, *chunk]
+        ).fetchall()
+        for input_hash, output in rows:
+            found[input_hash] = json.loads(output)
+
+    # touch hits so they survive eviction
+    if found:
+        now = time.time()
+        connection.executemany(
+            "UPDATE outputs SET last_used = ? WHERE model = ? AND version = ? AND input_hash = ?",
+            [(now, model, version, input_hash) for input_hash in found]
+        )
+        connection.commit()
+
+    return found
+
+def put_outputs(model, version, outputs):
+    # failed inferences come back as None and are left out so they get retried next run
+    rows = [(model, version, input_hash, json.dumps(output), time.time()) for input_hash, output in outputs.items() if output is not None]
+    if not INFERENCE_CACHE_ENABLED or not rows:
+        return
+
+    connection = cache.connection()
+    connection.executemany("INSERT OR REPLACE INTO outputs (model, version, input_hash, output, last_used) VALUES (?, ?, ?, ?, ?)", rows)
+    connection.commit()
+    cache.evict_if_needed()
+
+# returns model outputs lined up with inputs, only inputs missing from the cache are passed to infer (in one call)
+# infer takes a list of inputs and returns a list of outputs in the same order, outputs must be json serializable
+def cached_outputs(model, version, inputs, infer):
+    input_hashes = [content_hash(value) for value in inputs]
+    outputs = get_outputs(model, version, input_hashes)
+
+    missing = {}
+    for input_hash, value in zip(input_hashes, inputs):
+        if input_hash not in outputs and input_hash not in missing:
+            missing[input_hash] = value
+
+    if missing:
+        new_outputs = dict(zip(missing.keys(), infer(list(missing.values()))))
+        put_outputs(model, version, new_outputs)
+        outputs.update(new_outputs)
+
+    return [outputs[input_hash] for input_hash in input_hashes]
+
+def cache_info():
+    return cache.info()
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import time
+
+from sqlite_cache import SqliteCache
+
+# on-disk cache of LLM completions shared by every AI module (summaries, TLDR, transcript points, comparison, aspect
+# summaries), re-analysing a product sends near-identical prompts so a hit returns straight away instead of paying
+# for another gpt-4o-mini / sonar call
+# rows are keyed by provider, model, request parameters and a hash of the whitespace normalised prompt
+# entries expire after LLM_CACHE_TTL_HOURS (prices and comparisons go stale) and least recently used rows are evicted
+# past LLM_CACHE_MAX_MB, LLM_CACHE_ENABLED=0 or bypass=True always calls the model (fresh responses are still stored)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "64"))
+
+cache = SqliteCache("llm_cache.sqlite3", [
+    """
+    CREATE TABLE IF NOT EXISTS completions (
+        request_hash TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)",
+], table="completions", max_mb=LLM_CACHE_MAX_MB, name="LLM cache")
+
+# whitespace differences (indented prompt templates, trailing newlines) shouldn't miss the cache
+def normalize_text(text):
+    return " ".join(str(text).split())
+
+def request_hash(provider, model, messages, params=None):
+    request = {
+        "provider": provider,
+        "model": model,
+        "params": params or {},
+        "messages": [{"role": message["role"], "content": normalize_text(message["content"])} for message in messages],
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def get_completion(key):
+    connection = cache.connection()
+    row = connection.execute("SELECT response, created_at FROM completions WHERE request_hash = ?", (key,)).fetchone()
+    if row is None:
+        return None
+
+    response, created_at = row
+    if time.time() - created_at > LLM_CACHE_TTL:
+        return None
+
+    # touch hits so they survive eviction
+    connection.execute("UPDATE completions SET last_used = ? WHERE request_hash = ?", (time.time(), key))
+    connection.commit()
+    return response
+
+def put_completion(key, model, response):
+    now = time.time()
+    connection = cache.connection()
+    connection.execute(
+        "INSERT OR REPLACE INTO completions (request_hash, model, response, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+        (key, model, response, now, now)
+    )
+
+    # expired rows go first, then the least recently used
+    connection.execute("DELETE FROM completions WHERE created_at < ?", (now - LLM_CACHE_TTL,))
+    connection.commit()
+    cache.evict_if_needed()
+
+# returns the cached response text for this request, or calls complete() (no arguments, returns the response text)
+# and stores what it returns, empty or non-text responses (failed calls) are never stored so they get retried
+def cached_completion(provider, model, messages, params, complete, bypass=False):
+    key = request_hash(provider, model, messages, params)
+
+    if LLM_CACHE_ENABLED and not bypass:
+        response = get_completion(key)
+        if response is not None:
+            print(f"LLM cache hit for {provider} {model}.")
+            return response
+
+    response = complete()
+
+    if isinstance(response, str) and response.strip():
+        put_completion(key, model, response)
+
+    return response
+
+def cache_info():
+    return cache.info()
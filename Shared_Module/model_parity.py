@@ -0,0 +1,109 @@
+import sys
+import time
+
+from models import MODEL_BACKENDS, load_emotion_pipeline, load_sarcasm_pipeline, load_sentiment_pipeline, load_zero_shot_classifier
+
+# checks a faster backend (int8 / onnx) against the fp32 torch models on the same texts before switching MODEL_BACKEND
+# reports how often the top label agrees, how far the scores drift and the speedup
+# usage: python model_parity.py <int8|onnx> [texts_file, one text per line]
+
+# agreement below this fails the check
+MIN_AGREEMENT = 0.95
+
+SAMPLE_TEXTS = [
+    "The battery life is incredible, easily lasts two full days.",
+    "Screen is way too dim outdoors and the glare is awful.",
+    "Performance is fine for everyday tasks but it lags when gaming.",
+    "Honestly the keyboard feels cheap and the keys are mushy.",
+    "Great speakers, the sound is loud and clear with decent bass.",
+    "Oh great, another update that made my phone slower. Just what I needed.",
+    "The camera struggles in low light but daylight photos look sharp.",
+    "For the price you really can't beat it, amazing value.",
+    "It overheats after twenty minutes and the fans are really loud.",
+    "Build quality is solid, the aluminium body feels premium.",
+    "Charging is slow and the included power brick is tiny.",
+    "Love the display, colours are vibrant and the refresh rate is smooth.",
+]
+
+ZERO_SHOT_LABELS = ["positive about battery", "negative about battery", "neutral about battery"]
+
+def scores_by_label(output):
+    return {item["label"]: item["score"] for item in output}
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+def compare_outputs(name, reference_outputs, candidate_outputs, reference_time, candidate_time):
+    agreements = 0
+    differences = []
+
+    for reference, candidate in zip(reference_outputs, candidate_outputs):
+        if max(reference, key=reference.get) == max(candidate, key=candidate.get):
+            agreements += 1
+        differences.extend(abs(reference[label] - candidate.get(label, 0.0)) for label in reference)
+
+    report = {
+        "model": name,
+        "agreement": agreements / len(reference_outputs),
+        "mean_score_diff": sum(differences) / len(differences),
+        "max_score_diff": max(differences),
+        "speedup": reference_time / candidate_time if candidate_time else float("inf"),
+    }
+
+    print(f"{name}: top label agreement {report['agreement']:.1%}, mean score diff {report['mean_score_diff']:.4f}, max score diff {report['max_score_diff']:.4f}, speedup {report['speedup']:.2f}x")
+    return report
+
+def check_parity(backend, texts=SAMPLE_TEXTS):
+    if backend not in MODEL_BACKENDS or backend == "torch":
+        raise ValueError(f"Backend to check must be one of {[b for b in MODEL_BACKENDS if b != 'torch']}.")
+
+    reports = []
+
+    text_classifiers = {"sentiment": load_sentiment_pipeline, "sarcasm": load_sarcasm_pipeline, "emotion": load_emotion_pipeline}
+    for name, loader in text_classifiers.items():
+        reference_model = loader("torch")
+        candidate_model = loader(backend)
+
+        # warm up so model initialisation isn't counted in the timings
+        reference_model(texts[:1], top_k=None)
+        candidate_model(texts[:1], top_k=None)
+
+        reference_outputs, reference_time = timed(lambda: reference_model(texts, top_k=None))
+        candidate_outputs, candidate_time = timed(lambda: candidate_model(texts, top_k=None))
+
+        reports.append(compare_outputs(name, [scores_by_label(o) for o in reference_outputs], [scores_by_label(o) for o in candidate_outputs], reference_time, candidate_time))
+
+    reference_model = load_zero_shot_classifier("torch")
+    candidate_model = load_zero_shot_classifier(backend)
+    reference_model(texts[:1], ZERO_SHOT_LABELS)
+    candidate_model(texts[:1], ZERO_SHOT_LABELS)
+
+    reference_outputs, reference_time = timed(lambda: reference_model(texts, ZERO_SHOT_LABELS))
+    candidate_outputs, candidate_time = timed(lambda: candidate_model(texts, ZERO_SHOT_LABELS))
+
+    reports.append(compare_outputs("zero_shot", [dict(zip(o["labels"], o["scores"])) for o in reference_outputs], [dict(zip(o["labels"], o["scores"])) for o in candidate_outputs], reference_time, candidate_time))
+
+    return reports
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Enter a backend to check (int8 or onnx).")
+        sys.exit(1)
+
+    backend = sys.argv[1]
+    texts = SAMPLE_TEXTS
+
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    reports = check_parity(backend, texts)
+
+    failed = [report["model"] for report in reports if report["agreement"] < MIN_AGREEMENT]
+    if failed:
+        print(f"Parity check failed for: {', '.join(failed)}")
+        sys.exit(1)
+
+    print("Parity check passed.")
@@ -0,0 +1,137 @@
+import os
+import threading
+import spacy
+import torch
+from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
+
+from workspace import cache_directory
+
+# one place that loads every heavy model, each model is loaded once per process and then reused
+# the backend calls preload_models() at startup so no search pays the load time, scripts ran by hand load lazily
+
+# which variant of the transformer models to run, set with MODEL_BACKEND
+# torch - original fp32 weights on the best available device
+# int8 - fp32 weights with the linear layers dynamically quantized to int8, cpu only, much faster per core for a small accuracy cost
+# onnx - exported to ONNX and ran with ONNX Runtime, needs the optional optimum[onnxruntime] package
+MODEL_BACKENDS = ["torch", "int8", "onnx"]
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+
+if MODEL_BACKEND not in MODEL_BACKENDS:
+    raise ValueError(f"Unknown MODEL_BACKEND {MODEL_BACKEND}, expected one of {MODEL_BACKENDS}.")
+
+# picks cuda, then apple MPS, then cpu, MODEL_DEVICE overrides it (e.g. MODEL_DEVICE=cpu)
+def select_device():
+    requested = os.getenv("MODEL_DEVICE")
+    if requested:
+        return torch.device(requested)
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    if torch.backends.mps.is_available():
+        return torch.device("mps")
+    return torch.device("cpu")
+
+device = select_device()
+
+_models = {}
+_lock = threading.Lock()
+
+def _get_or_load(name, loader):
+    # lock so two stages starting at the same time don't both load the same model
+    with _lock:
+        if name not in _models:
+            _models[name] = loader()
+        return _models[name]
+
+def load_spacy():
+    return _get_or_load("spacy", lambda: spacy.load("en_core_web_sm"))
+
+SENTIMENT_MODEL = "nlptown/bert-base-multilingual-uncased-sentiment"
+SARCASM_MODEL = "cardiffnlp/twitter-roberta-base-irony"
+EMOTION_MODEL = "cardiffnlp/bertweet-base-emotion"
+ZERO_SHOT_MODEL = "facebook/bart-large-mnli"
+
+# bump a model's version when its weights or loading settings (truncation, max length...) change
+# so outputs cached on disk from the old setup stop being used
+MODEL_VERSIONS = {
+    SENTIMENT_MODEL: "1",
+    SARCASM_MODEL: "1",
+    EMOTION_MODEL: "1",
+    ZERO_SHOT_MODEL: "1",
+}
+
+# the backend is part of the version, quantized and onnx outputs differ slightly from fp32 so they're cached separately
+def model_version(model_name, backend=None):
+    return f"{MODEL_VERSIONS[model_name]}-{backend or MODEL_BACKEND}"
+
+# onnx exports are slow, each model is exported once and reused from the cache folder
+def load_onnx_model(model_name):
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    export_directory = os.path.join(cache_directory, "onnx_models", model_name.replace("/", "__"))
+
+    if os.path.isfile(os.path.join(export_directory, "model.onnx")):
+        return ORTModelForSequenceClassification.from_pretrained(export_directory)
+
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    os.makedirs(export_directory, exist_ok=True)
+    model.save_pretrained(export_directory)
+    return model
+
+def load_classifier_model(model_name, backend=None):
+    backend = backend or MODEL_BACKEND
+
+    if backend == "onnx":
+        return load_onnx_model(model_name), None # onnx runtime picks its own execution provider
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model, torch.device("cpu")
+
+    return model, device
+
+# every transformer pipeline is built the same way whatever the backend, so the stage scripts don't change
+def build_pipeline(task, model_name, backend=None, **kwargs):
+    model, model_device = load_classifier_model(model_name, backend)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if model_device is not None:
+        kwargs["device"] = model_device
+
+    return pipeline(task, model=model, tokenizer=tokenizer, **kwargs)
+
+# nlptown returns 1 - 5 stars, used by GoogleABSA
+def load_sentiment_pipeline(backend=None):
+    return _get_or_load(("sentiment", backend or MODEL_BACKEND), lambda: build_pipeline("sentiment-analysis", SENTIMENT_MODEL, backend))
+
+# truncation true, fixed for overflowing
+def load_sarcasm_pipeline(backend=None):
+    return _get_or_load(("sarcasm", backend or MODEL_BACKEND), lambda: build_pipeline("text-classification", SARCASM_MODEL, backend, truncation=True, padding=True, max_length=256))
+
+def load_emotion_pipeline(backend=None):
+    return _get_or_load(("emotion", backend or MODEL_BACKEND), lambda: build_pipeline("text-classification", EMOTION_MODEL, backend, truncation=True, padding=True, max_length=512))
+
+def load_zero_shot_classifier(backend=None):
+    return _get_or_load(("zero_shot", backend or MODEL_BACKEND), lambda: build_pipeline("zero-shot-classification", ZERO_SHOT_MODEL, backend, truncation=True, max_length=512))
+
+# batched inference with length bucketing, texts are sorted by token length so each padded batch holds similar
+# lengths and wastes little compute on padding, outputs come back in the original order
+def run_length_bucketed(model_pipeline, texts, batch_size=32, **kwargs):
+    if not texts:
+        return []
+
+    token_lengths = model_pipeline.tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+    order = sorted(range(len(texts)), key=lambda i: len(token_lengths[i]), reverse=True)
+    outputs = model_pipeline([texts[i] for i in order], batch_size=batch_size, **kwargs)
+
+    results = [None] * len(texts)
+    for i, output in zip(order, outputs):
+        results[i] = output
+    return results
+
+def preload_models():
+    load_spacy()
+    load_sentiment_pipeline()
+    load_sarcasm_pipeline()
+    load_emotion_pipeline()
+    load_zero_shot_classifier()
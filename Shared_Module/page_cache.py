@@ -0,0 +1,68 @@
+import os
+import time
+
+from sqlite_cache import SqliteCache
+
+# on-disk cache of scraped pages keyed by url, related searches keep returning the same review and forum pages
+# the already extracted text is stored so a fresh hit skips both the download and the html parsing
+# stale pages are revalidated with ETag / Last-Modified, a 304 reuses the stored text
+
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") != "0"
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL_HOURS", "24")) * 3600
+# pages nobody has asked for in this long are dropped
+PAGE_CACHE_MAX_AGE = float(os.getenv("PAGE_CACHE_MAX_AGE_DAYS", "30")) * 86400
+
+# not size limited, old pages are dropped by age in prune_pages instead
+cache = SqliteCache("page_cache.sqlite3", [
+    """
+    CREATE TABLE IF NOT EXISTS pages (
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        text TEXT NOT NULL,
+        fetched_at REAL NOT NULL
+    )
+    """,
+], table="pages", name="Page cache")
+
+def get_page(url):
+    if not PAGE_CACHE_ENABLED:
+        return None
+
+    row = cache.connection().execute("SELECT etag, last_modified, text, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+    if row is None:
+        return None
+
+    etag, last_modified, text, fetched_at = row
+    return {"etag": etag, "last_modified": last_modified, "text": text, "fetched_at": fetched_at}
+
+def is_fresh(page):
+    return time.time() - page["fetched_at"] < PAGE_CACHE_TTL
+
+def put_page(url, text, etag=None, last_modified=None):
+    if not PAGE_CACHE_ENABLED:
+        return
+
+    connection = cache.connection()
+    connection.execute(
+        "INSERT OR REPLACE INTO pages (url, etag, last_modified, text, fetched_at) VALUES (?, ?, ?, ?, ?)",
+        (url, etag, last_modified, text, time.time())
+    )
+    connection.commit()
+
+# a 304 means the stored text is still current, restart its ttl
+def touch_page(url):
+    if not PAGE_CACHE_ENABLED:
+        return
+
+    connection = cache.connection()
+    connection.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+    connection.commit()
+
+def prune_pages():
+    if not PAGE_CACHE_ENABLED:
+        return
+
+    connection = cache.connection()
+    connection.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - PAGE_CACHE_MAX_AGE,))
+    connection.commit()
@@ -0,0 +1,73 @@
+import os
+
+from models import EMOTION_MODEL, SARCASM_MODEL, SENTIMENT_MODEL, ZERO_SHOT_MODEL
+from stage_graph import Stage
+
+# the whole analysis pipeline as one graph, each stage lists the job folder files it reads and writes
+# the order stages run in comes from these, not from the order they're listed in
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+def script(*parts):
+    return os.path.abspath(os.path.join(script_dir, "..", *parts))
+
+GOOGLE_STAGES = [
+    Stage("google_search", script("Data_Collection_Module/GoogleSearchCollection/GoogleSearch.py"),
+          outputs=["google_discussion_links.txt"], progress=("google", 20)),
+    Stage("google_extraction", script("Data_Collection_Module/GoogleSearchCollection/GoogleSearchExtraction.py"),
+          inputs=["google_discussion_links.txt"], outputs=["scraped_texts"], progress=("google", 20)),
+    Stage("google_cleaner", script("Data_Collection_Module/GoogleSearchCollection/GoogleSearchCleaner.py"),
+          inputs=["scraped_texts"], outputs=["sentiment_ready_texts"], progress=("google", 20)),
+    Stage("context_prep", script("Data_Collection_Module/GoogleSearchCollection/ContextModelPrep.py"),
+          inputs=["sentiment_ready_texts"], outputs=["processed_dataset.json"], progress=("google", 20)),
+    Stage("google_absa", script("AI_Module/GoogleABSA.py"),
+          inputs=["processed_dataset.json"], outputs=["analyzed_sentiments.json", "snippets_log.txt"], progress=("google", 20),
+          models=[SENTIMENT_MODEL]),
+]
+
+YOUTUBE_STAGES = [
+    Stage("youtube_search", script("Data_Collection_Module/YoutubeCollection/YoutubeSearch.py"),
+          outputs=["youtube_comments.csv", "youtube_transcripts.csv"], progress=("youtube", 10)),
+    Stage("comment_cleaner", script("Data_Collection_Module/YoutubeCollection/YoutubeSearchCommentCleaner.py"),
+          inputs=["youtube_comments.csv"], outputs=["cleaned_youtube_comments.csv"], progress=("youtube", 15)),
+    Stage("prep_comments", script("Data_Collection_Module/YoutubeCollection/PrepComments.py"),
+          inputs=["cleaned_youtube_comments.csv"], outputs=["processed_youtube_comments.arrow"], progress=("youtube", 15),
+          models=[EMOTION_MODEL, SARCASM_MODEL]),
+    Stage("prep_transcripts", script("Data_Collection_Module/YoutubeCollection/PrepTranscripts.py"),
+          inputs=["youtube_transcripts.csv"], outputs=["cleaned_youtube_transcripts.arrow"], progress=("youtube", 15)),
+    Stage("transcript_absa", script("AI_Module/TranscriptABSA.py"),
+          inputs=["cleaned_youtube_transcripts.arrow"], outputs=["processed_youtube_transcripts.arrow"], progress=("youtube", 15),
+          models=[ZERO_SHOT_MODEL]),
+    Stage("condense_transcripts", script("Data_Collection_Module/YoutubeCollection/CondenseTranscripts.py"),
+          inputs=["youtube_transcripts.csv"], outputs=["condensed_transcripts.csv"], progress=("youtube", 15)),
+    Stage("transcript_llm", script("AI_Module/TranscriptLLM.py"),
+          inputs=["condensed_transcripts.csv"], outputs=["benefits_drawbacks.json", "tech_keywords.json"], progress=("youtube", 15)),
+]
+
+AI_STAGES = [
+    # starts as soon as both the cleaned comments and the google dataset exist, no more watching files
+    Stage("summarization", script("AI_Module/Summarization.py"),
+          inputs=["cleaned_youtube_comments.csv", "processed_dataset.json"], outputs=["both_summaries.txt"], progress=("summary", 100)),
+    Stage("comparison", script("AI_Module/GetComparison.py"),
+          outputs=["comparison_output.txt", "best_features.txt"], progress=("comparison", 100)),
+    Stage("tldr", script("AI_Module/TLDR-LLM.py"),
+          inputs=["condensed_transcripts.csv", "cleaned_youtube_comments.csv", "analyzed_sentiments.json"], outputs=["tldr_summary.txt", "tldr_output.log"]),
+]
+
+# final stage, builds the results document from everything above so /api/results only serves a stored file
+RESULTS_STAGES = [
+    Stage("results", script("Backend_Module/BuildResults.py"),
+          inputs=[
+              "analyzed_sentiments.json", "processed_youtube_comments.arrow", "both_summaries.txt", "comparison_output.txt",
+              "best_features.txt", "processed_youtube_transcripts.arrow", "benefits_drawbacks.json", "tech_keywords.json",
+              "google_discussion_links.txt", "youtube_comments.csv", "cleaned_youtube_comments.csv", "youtube_transcripts.csv",
+              "cleaned_youtube_transcripts.arrow",
+          ],
+          optional_inputs=["tldr_summary.txt"], # the verdict is left blank if the TLDR call fails
+          outputs=["results.json"], progress=("results", 100)),
+]
+
+PIPELINE = GOOGLE_STAGES + YOUTUBE_STAGES + AI_STAGES + RESULTS_STAGES
+
+def pipeline_scripts(stages=PIPELINE):
+    return [stage.script for stage in stages]
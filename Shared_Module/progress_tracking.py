@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from workspace import job_path
+
+# single progress helper for every module, progress of running jobs is kept in memory in this process
+# updates are atomic under one lock and pushed to whoever is watching (the /api/progress/stream endpoint)
+# progress.json in the job folder is only written when a job starts and finishes, so finished jobs can still be read
+# after a restart and scripts ran by hand leave their final progress behind
+
+progress_lock = threading.Lock()
+progress_store = {} # job id -> progress of jobs still running
+subscribers = defaultdict(list) # job id -> callbacks given a copy of the progress on every change
+
+def write_progress_file(progress_data, job_id):
+    progress_file = job_path(job_id, "progress.json")
+    temp_file = f"{progress_file}.tmp"
+
+    with open(temp_file, "w") as f:
+        json.dump(progress_data, f, indent=2)
+    os.replace(temp_file, progress_file)
+
+# called with the lock held so watchers get updates in the order they happened, callbacks must not block
+def notify(job_id, progress_data):
+    for callback in subscribers.get(job_id, ()):
+        callback(dict(progress_data))
+
+def reset_progress(job_id=None):
+    # results is the final stage building the results document, completed means the results are ready to fetch
+    progress_data = {"google": 0, "youtube": 0, "summary": 0, "comparison": 0, "results": 0, "completed": False}
+
+    write_progress_file(progress_data, job_id)
+
+    with progress_lock:
+        progress_store[job_id] = progress_data
+        notify(job_id, progress_data)
+
+    return dict(progress_data)
+
+def read_progress(job_id=None):
+    with progress_lock:
+        if job_id in progress_store:
+            return dict(progress_store[job_id])
+
+    with open(job_path(job_id, "progress.json"), "r") as f:
+        return json.load(f)
+
+def update_progress(module, percent, job_id=None):
+    with progress_lock:
+        progress_data = progress_store.get(job_id)
+
+        # job started outside this process (script ran by hand), carry on from its file
+        if progress_data is None:
+            try:
+                with open(job_path(job_id, "progress.json"), "r") as f:
+                    progress_data = json.load(f)
+            except FileNotFoundError:
+                progress_data = {"completed": False}
+            progress_store[job_id] = progress_data
+
+        progress_data[module] = progress_data.get(module, 0) + percent
+
+        if all(isinstance(v, int) and v == 100 for k, v in progress_data.items() if k != "completed"): # fixed checking if completed is already true to prevent constant resetting
+            progress_data["completed"] = True
+
+        snapshot = dict(progress_data)
+
+        # finished jobs leave memory, readers fall back to the file (written first so nobody reads it half done)
+        if snapshot["completed"]:
+            write_progress_file(snapshot, job_id)
+            del progress_store[job_id]
+
+        notify(job_id, snapshot)
+
+# callback is called with the progress on every change, returns the current progress (None if the job hasn't started)
+def subscribe_progress(job_id, callback):
+    with progress_lock:
+        subscribers[job_id].append(callback)
+
+    try:
+        return read_progress(job_id)
+    except FileNotFoundError:
+        return None
+
+def unsubscribe_progress(job_id, callback):
+    with progress_lock:
+        callbacks = subscribers.get(job_id)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            subscribers.pop(job_id, None)
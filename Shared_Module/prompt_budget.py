@@ -0,0 +1,113 @@
+import threading
+
+import tiktoken
+
+# shared prompt builder for the LLM stages, counts real model tokens (tiktoken) instead of guessing from words
+# a prompt's data is made of sections (comments, sentences, transcripts...), each with a weight, the data budget is
+# split between sections by weight and whatever a section doesn't need is handed to the others, so a prompt is
+# filled right up to its budget without going over the model's context
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# context windows in tokens, prompts are always capped to fit these along with the reply
+MODEL_CONTEXT = {"gpt-4o-mini": 128000}
+
+# an item cut down to fewer tokens than this isn't worth including
+MIN_PARTIAL_TOKENS = 20
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+def get_encoding(model=DEFAULT_MODEL):
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                # models tiktoken doesn't know use the gpt-4o tokenizer
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        return _encodings[model]
+
+def count_tokens(text, model=DEFAULT_MODEL):
+    return len(get_encoding(model).encode(text or "", disallowed_special=()))
+
+def truncate_to_tokens(text, max_tokens, model=DEFAULT_MODEL):
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text or "", disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text or ""
+    return encoding.decode(tokens[:max(max_tokens, 0)]).rstrip()
+
+# tokens left for data once the fixed parts of the prompt (instructions, template) and the reply are accounted for
+def data_budget(budget, fixed_text="", reply_tokens=0, model=DEFAULT_MODEL):
+    context_left = MODEL_CONTEXT.get(model, min(MODEL_CONTEXT.values())) - count_tokens(fixed_text, model) - reply_tokens
+    return max(0, min(budget, context_left))
+
+# splits budget between demands in proportion to weights, a demand smaller than its share only gets what it needs
+# and the rest is shared out again between the others
+def allocate(demands, weights, budget):
+    allocation = [0] * len(demands)
+    active = [i for i, demand in enumerate(demands) if demand > 0]
+    remaining = budget
+
+    while active and remaining > 0:
+        total_weight = sum(weights[i] for i in active)
+        satisfied = [i for i in active if demands[i] <= remaining * weights[i] / total_weight]
+
+        if not satisfied:
+            for i in active:
+                allocation[i] = int(remaining * weights[i] / total_weight)
+            break
+
+        for i in satisfied:
+            allocation[i] = demands[i]
+            remaining -= demands[i]
+            active.remove(i)
+
+    return allocation
+
+class Section:
+    def __init__(self, name, items, weight=1, separator=" ", even=False):
+        self.name = name
+        self.items = [item for item in items if isinstance(item, str) and item.strip()] # already in priority order
+        self.weight = weight
+        self.separator = separator
+        self.even = even # give every item an equal share (e.g. one per video) instead of filling in order
+
+# fills each section up to its share of budget, returns {section name: text}
+def fill_sections(sections, budget, model=DEFAULT_MODEL):
+    item_tokens = [[count_tokens(item, model) for item in section.items] for section in sections]
+    demands = [sum(tokens) + count_tokens(section.separator, model) * max(len(tokens) - 1, 0) for section, tokens in zip(sections, item_tokens)]
+    allocation = allocate(demands, [section.weight for section in sections], budget)
+
+    texts = {}
+    for section, tokens, section_budget in zip(sections, item_tokens, allocation):
+        separator_tokens = count_tokens(section.separator, model)
+
+        if section.even:
+            # each item gets an equal share, short items hand what they don't use to the longer ones
+            item_budget = max(section_budget - separator_tokens * max(len(tokens) - 1, 0), 0)
+            shares = allocate(tokens, [1] * len(tokens), item_budget)
+            parts = [item if share >= count else truncate_to_tokens(item, share, model) for item, count, share in zip(section.items, tokens, shares) if share >= min(count, MIN_PARTIAL_TOKENS)]
+        else:
+            # items in order while they fit, the first one that doesn't is cut down to the space left
+            parts = []
+            used = 0
+            for item, count in zip(section.items, tokens):
+                cost = count + (separator_tokens if parts else 0)
+                if used + cost <= section_budget:
+                    parts.append(item)
+                    used += cost
+                    continue
+
+                space_left = section_budget - used - (separator_tokens if parts else 0)
+                if space_left >= MIN_PARTIAL_TOKENS:
+                    parts.append(truncate_to_tokens(item, space_left, model))
+                break
+
+        text = section.separator.join(parts)
+
+        # tokens can merge across the joins, trim so the section never goes over its share
+        texts[section.name] = truncate_to_tokens(text, section_budget, model)
+
+    return texts
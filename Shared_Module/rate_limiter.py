@@ -0,0 +1,40 @@
+import threading
+import time
+
+# thread safe token bucket, tokens refill at a steady rate up to capacity and each call spends some
+# lets parallel fetchers share one budget (e.g. an API quota) instead of sleeping between calls
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        if capacity <= 0 or rate <= 0:
+            raise ValueError("Token bucket rate and capacity must be positive.")
+
+        self.rate = rate # tokens added per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # blocks until cost tokens are available, returns False instead if that would take longer than timeout
+    def acquire(self, cost=1, timeout=None):
+        if cost > self.capacity:
+            raise ValueError(f"Cost {cost} is more than the bucket capacity {self.capacity}.")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return True
+                wait_time = (cost - self.tokens) / self.rate
+
+            if deadline is not None and time.monotonic() + wait_time > deadline:
+                return False
+
+            time.sleep(wait_time)
@@ -0,0 +1,83 @@
+import heapq
+import os
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# orders comments / sentences going into an LLM prompt so the most representative come first, instead of the first
+# ones collected. items are clustered on TF-IDF vectors, then taken from every cluster in turn (bigger clusters more
+# often), most central items of a cluster first, with near duplicates dropped, so wherever prompt_budget cuts the
+# list off the prompt covers every theme that was talked about instead of repeating the same few
+
+SAMPLE_CLUSTERS = int(os.getenv("SAMPLE_CLUSTERS", "12"))
+
+# fewer items than this aren't worth clustering, they're only deduplicated
+MIN_CLUSTER_ITEMS = 20
+
+# items whose tf-idf vectors are at least this similar to one already picked from their cluster are dropped
+DUPLICATE_SIMILARITY = 0.9
+
+# fixed seed so the same items always come out in the same order and the LLM cache still hits
+RANDOM_STATE = 0
+
+def unique_items(items):
+    seen = set()
+    unique = []
+    for item in items:
+        if not isinstance(item, str) or not item.strip():
+            continue
+        key = " ".join(item.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+def cluster_count(item_count, clusters):
+    # about one cluster per 10 items, so small inputs aren't split into clusters of one or two
+    return max(2, min(clusters, item_count // 10))
+
+# keeps items in order of closeness to their cluster's centre, skipping near duplicates of ones already kept
+def central_items(indices, distances, vectors):
+    kept = []
+    for i in sorted(indices, key=lambda i: distances[i]):
+        if kept and (vectors[kept] @ vectors[i].T).max() >= DUPLICATE_SIMILARITY:
+            continue
+        kept.append(i)
+    return kept
+
+# returns items (deduplicated) most representative first, feed the result to a prompt_budget Section
+def representative_order(items, clusters=SAMPLE_CLUSTERS):
+    items = unique_items(items)
+    if len(items) < MIN_CLUSTER_ITEMS:
+        return items
+
+    try:
+        vectors = TfidfVectorizer(stop_words="english", sublinear_tf=True, max_features=5000).fit_transform(items)
+    except ValueError:
+        # nothing but stop words, nothing to cluster on
+        return items
+
+    kmeans = KMeans(n_clusters=cluster_count(len(items), clusters), n_init=4, random_state=RANDOM_STATE)
+    labels = kmeans.fit_predict(vectors)
+    distances = kmeans.transform(vectors)[np.arange(len(items)), labels]
+
+    members = {}
+    for i, label in enumerate(labels):
+        members.setdefault(label, []).append(i)
+    ranked = {label: central_items(indices, distances, vectors) for label, indices in members.items()}
+
+    # each turn goes to the cluster with the highest size / (items taken + 1), so clusters show up in proportion to
+    # their size but every cluster gets its most central item in early
+    heap = [(-len(indices), label, 0) for label, indices in ranked.items()]
+    heapq.heapify(heap)
+
+    ordered = []
+    while heap:
+        _, label, taken = heapq.heappop(heap)
+        ordered.append(items[ranked[label][taken]])
+        taken += 1
+        if taken < len(ranked[label]):
+            heapq.heappush(heap, (-len(ranked[label]) / (taken + 1), label, taken))
+
+    return ordered
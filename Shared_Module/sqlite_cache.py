@@ -0,0 +1,62 @@
+import sqlite3
+import threading
+
+from workspace import cache_path
+
+# shared plumbing of the on-disk sqlite caches (model outputs, llm completions, scraped pages), each cache only gives
+# its file, schema and size limit
+# every thread opens its own connection in WAL mode so readers don't block the writer when several jobs run at once,
+# caches with a size limit evict their least recently used rows (by a last_used column) once the file grows past it
+
+# evict down to this fraction of the limit so eviction doesn't run on every write once the cache is full
+EVICTION_TARGET = 0.9
+
+class SqliteCache:
+    def __init__(self, file_name, schema, table, max_mb=None, name="Cache"):
+        self.file_name = file_name
+        self.schema = list(schema) # CREATE statements ran when a thread opens its connection
+        self.table = table # main table, counted by info() and evicted by last_used
+        self.max_mb = max_mb # None for caches that aren't size limited
+        self.name = name
+        self.local = threading.local()
+
+    def connection(self):
+        # sqlite connections can't be shared between threads, each worker thread opens its own
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(cache_path(self.file_name), timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.schema:
+                connection.execute(statement)
+            connection.commit()
+            self.local.connection = connection
+        return connection
+
+    def used_bytes(self):
+        connection = self.connection()
+        page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+        page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def evict_if_needed(self):
+        if self.max_mb is None:
+            return
+
+        max_bytes = self.max_mb * 1024 * 1024
+        used = self.used_bytes()
+        if used <= max_bytes:
+            return
+
+        # rows are roughly the same size, so drop the oldest share of rows that gets the cache back under the target
+        connection = self.connection()
+        row_count = connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        evict_count = max(1, int(row_count * (1 - (max_bytes * EVICTION_TARGET) / used)))
+        connection.execute(f"DELETE FROM {self.table} WHERE rowid IN (SELECT rowid FROM {self.table} ORDER BY last_used LIMIT ?)", (evict_count,))
+        connection.commit()
+        print(f"{self.name} over {self.max_mb} MB, evicted {evict_count} entries.")
+
+    def info(self):
+        entries = self.connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return {"entries": entries, "size_mb": round(self.used_bytes() / (1024 * 1024), 2), "max_mb": self.max_mb}
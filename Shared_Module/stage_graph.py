@@ -0,0 +1,114 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from progress_tracking import update_progress
+from stage_manifest import run_stage_incremental
+
+# runs a graph of pipeline stages for one job, a stage is started the moment every stage producing its inputs has
+# finished, so independent branches run side by side and the job takes as long as its longest chain
+
+class Stage:
+    def __init__(self, name, script, inputs=(), outputs=(), progress=None, code=(), models=(), optional_inputs=()):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs) + list(optional_inputs) # files / folders in the job folder the stage reads
+        self.optional_inputs = list(optional_inputs) # waited for, but the stage still runs if they couldn't be made
+        self.outputs = list(outputs) # files / folders in the job folder the stage writes
+        self.progress = progress # (progress bar module, percent) added once the stage is done
+        self.code = list(code) # other files the stage's output depends on, its own script and the shared modules it imports are found automatically
+        self.models = list(models) # model names whose versions the stage's output depends on
+
+# a stage depends on whichever stages write its inputs, inputs nothing in the graph writes must already exist
+def build_dependencies(stages):
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"{output} is written by both {producers[output]} and {stage.name}.")
+            producers[output] = stage.name
+
+    dependencies = {stage.name: {producers[i] for i in stage.inputs if i in producers and producers[i] != stage.name} for stage in stages}
+    required = {stage.name: {producers[i] for i in stage.inputs if i in producers and i not in stage.optional_inputs} for stage in stages}
+
+    # make sure the graph can finish, a cycle would leave stages waiting forever
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage graph has a cycle between: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return dependencies, required
+
+# only the named stages, inputs written by stages left out are treated as already existing
+def subgraph(stages, names):
+    return [stage for stage in stages if stage.name in names]
+
+def run_graph(stages, product_name, job_id=None, executor=None):
+    dependencies, required = build_dependencies(stages)
+    stages_by_name = {stage.name: stage for stage in stages}
+
+    dependents = defaultdict(list)
+    for name, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].append(name)
+
+    waiting_on = {name: set(deps) for name, deps in dependencies.items()}
+    results = {}
+    running = {}
+
+    # scripts ran by hand don't have the worker pool, give them a pool for this run
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=len(stages) or 1, thread_name_prefix="stage")
+
+    def finish(name):
+        stage = stages_by_name[name]
+        # failed and skipped stages still count so the progress bar always completes, like the old chains
+        if stage.progress is not None:
+            update_progress(stage.progress[0], stage.progress[1], job_id)
+        for dependent in dependents[name]:
+            waiting_on[dependent].discard(name)
+
+    def start_ready_stages():
+        # loops as skipping a stage can make its own dependents ready straight away
+        started = True
+        while started:
+            started = False
+            for name in [name for name, deps in waiting_on.items() if not deps]:
+                del waiting_on[name]
+                started = True
+
+                failed = [dep for dep in required[name] if results[dep]["status"] != "Success"]
+                if failed:
+                    print(f"\n=== Skipping {name}, needs output of failed stage(s): {', '.join(failed)} ===")
+                    results[name] = {"script": os.path.basename(stages_by_name[name].script), "status": "Skipped", "error": f"Failed dependencies: {', '.join(failed)}"}
+                    finish(name)
+                else:
+                    # stages whose inputs haven't changed since an earlier job reuse that job's outputs
+                    running[executor.submit(run_stage_incremental, stages_by_name[name], product_name, job_id)] = name
+
+    try:
+        start_ready_stages()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    # failures outside the script itself (hashing inputs, restoring or storing outputs) count as the
+                    # stage failing, so its dependents are skipped and the job still finishes
+                    print(f"Error running stage {name}: {e}")
+                    results[name] = {"script": os.path.basename(stages_by_name[name].script), "status": "Error", "error": str(e)}
+                finish(name)
+            start_ready_stages()
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True)
+
+    return results
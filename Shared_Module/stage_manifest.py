@@ -0,0 +1,175 @@
+import ast
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from worker_pool import run_stage
+from workspace import cache_directory, job_path
+
+# incremental runs, before a stage runs its inputs, code and model versions are hashed into a manifest
+# if an earlier job ran the same stage with the same manifest its stored outputs are copied into this job instead
+# so refreshing a product only pays for the stages whose data actually changed
+# stages with no inputs (searches, comparison) fetch live data and always run
+
+STAGE_CACHE_ENABLED = os.getenv("STAGE_CACHE_ENABLED", "1") != "0"
+# older stored outputs of a stage are dropped past this many
+STAGE_CACHE_ENTRIES_PER_STAGE = int(os.getenv("STAGE_CACHE_ENTRIES_PER_STAGE", "20"))
+
+stage_cache_directory = os.path.join(cache_directory, "stage_outputs")
+shared_directory = os.path.dirname(os.path.abspath(__file__))
+
+def hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# folders are hashed by the name and content of every file inside them
+def hash_path(path):
+    if os.path.isfile(path):
+        return hash_file(path)
+
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for root, directories, files in os.walk(path):
+            directories.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+                digest.update(hash_file(file_path).encode("utf-8"))
+        return digest.hexdigest()
+
+    return "missing"
+
+# every Shared_Module file a script imports, directly or through other shared modules, so editing any shared code a
+# stage runs (taxonomy, models, columnar, prompt building...) invalidates its stored outputs
+def shared_imports(file_path, found=None):
+    found = set() if found is None else found
+
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except SyntaxError:
+        # can't tell what it imports, count every shared module so nothing stale is reused
+        found.update(os.path.join(shared_directory, name) for name in os.listdir(shared_directory) if name.endswith(".py"))
+        return found
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+
+        for name in names:
+            module_path = os.path.join(shared_directory, f"{name.split('.')[0]}.py")
+            if module_path not in found and os.path.isfile(module_path):
+                found.add(module_path)
+                shared_imports(module_path, found)
+
+    return found
+
+def build_manifest(stage, product_name, job_id):
+    manifest = {
+        "stage": stage.name,
+        "product_name": product_name,
+        "inputs": {name: hash_path(job_path(job_id, name)) for name in stage.inputs},
+        "code": {os.path.basename(path): hash_file(path) for path in sorted({stage.script, *stage.code, *shared_imports(stage.script)})},
+        "models": {},
+    }
+
+    if stage.models:
+        from models import model_version
+        manifest["models"] = {model: model_version(model) for model in stage.models}
+
+    manifest["key"] = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()
+    return manifest
+
+def save_manifest(manifest, job_id, reused):
+    manifests_directory = job_path(job_id, "manifests")
+    os.makedirs(manifests_directory, exist_ok=True)
+
+    with open(os.path.join(manifests_directory, f"{manifest['stage']}.json"), "w", encoding="utf-8") as f:
+        json.dump({**manifest, "reused": reused, "finished_at": time.time()}, f, indent=2)
+
+def copy_outputs(outputs, source_directory, target_directory):
+    for name in outputs:
+        source = os.path.join(source_directory, name)
+        target = os.path.join(target_directory, name)
+
+        if os.path.isdir(source):
+            shutil.copytree(source, target, dirs_exist_ok=True)
+        elif os.path.isfile(source):
+            shutil.copy2(source, target)
+
+def restore_outputs(stage, manifest, job_id):
+    entry_directory = os.path.join(stage_cache_directory, stage.name, manifest["key"])
+    if not os.path.isfile(os.path.join(entry_directory, "manifest.json")):
+        return False
+
+    copy_outputs(stage.outputs, entry_directory, job_path(job_id))
+    os.utime(entry_directory) # most recently used entries are the ones kept
+    return True
+
+def store_outputs(stage, manifest, job_id):
+    stage_directory = os.path.join(stage_cache_directory, stage.name)
+    entry_directory = os.path.join(stage_directory, manifest["key"])
+
+    # written to a temp folder first so another job never restores half copied outputs
+    temp_directory = f"{entry_directory}.tmp{os.getpid()}_{time.monotonic_ns()}"
+    os.makedirs(temp_directory)
+    copy_outputs(stage.outputs, job_path(job_id), temp_directory)
+    with open(os.path.join(temp_directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    try:
+        os.rename(temp_directory, entry_directory)
+    except OSError:
+        # another job stored the same outputs first
+        shutil.rmtree(temp_directory, ignore_errors=True)
+
+    prune_stage_outputs(stage_directory)
+
+def prune_stage_outputs(stage_directory):
+    entries = [os.path.join(stage_directory, name) for name in os.listdir(stage_directory) if ".tmp" not in name]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for entry in entries[STAGE_CACHE_ENTRIES_PER_STAGE:]:
+        shutil.rmtree(entry, ignore_errors=True)
+
+# pre-created folders and files opened but never written don't count as outputs
+def output_written(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path) > 0
+    if os.path.isdir(path):
+        return any(files for _, _, files in os.walk(path))
+    return False
+
+# runs a stage for a job, or reuses the outputs of an earlier identical run
+def run_stage_incremental(stage, product_name, job_id=None):
+    if not STAGE_CACHE_ENABLED or not stage.inputs:
+        return run_stage(stage.script, product_name, job_id)
+
+    manifest = build_manifest(stage, product_name, job_id)
+
+    if restore_outputs(stage, manifest, job_id):
+        print(f"\n=== Stage Reused: {os.path.basename(stage.script)} (inputs unchanged) ===")
+        save_manifest(manifest, job_id, reused=True)
+        return {"script": os.path.basename(stage.script), "status": "Success", "output": None, "reused": True}
+
+    result = run_stage(stage.script, product_name, job_id)
+
+    # some stages log their own errors and carry on, only keep outputs that were actually all written
+    outputs_written = all(output_written(job_path(job_id, name)) for name in stage.outputs)
+
+    if result["status"] == "Success" and outputs_written:
+        save_manifest(manifest, job_id, reused=False)
+        try:
+            store_outputs(stage, manifest, job_id)
+        except OSError as e:
+            print(f"Error storing outputs of {stage.name}: {e}")
+
+    return result
@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# long-lived pool the backend uses to run pipeline stages as in-process jobs instead of a new python3 process per stage
+# stage modules are imported once and share the models loaded in models.py
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.abspath(os.path.join(script_dir, ".."))
+
+_stages = {}
+_stages_lock = threading.RLock()
+
+# stage scripts live in different folders and some share names (RunAll.py), so import them by path with a unique name
+def load_stage(script_path):
+    script_path = os.path.abspath(script_path)
+
+    with _stages_lock:
+        if script_path not in _stages:
+            relative = os.path.relpath(script_path, project_dir)
+            module_name = "stage_" + os.path.splitext(relative)[0].replace(os.sep, "_").replace("-", "_")
+
+            spec = importlib.util.spec_from_file_location(module_name, script_path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+
+            _stages[script_path] = module
+
+        return _stages[script_path]
+
+# every stage script exposes run(product_name, job_id), errors are reported the same way run_script used to
+def run_stage(script_path, product_name, job_id=None):
+    script_name = os.path.basename(script_path)
+    print(f"\n=== Stage Execution: {script_name} ===")
+
+    try:
+        output = load_stage(script_path).run(product_name, job_id)
+        return {"script": script_name, "status": "Success", "output": output}
+    except Exception as e:
+        traceback.print_exc()
+        return {"script": script_name, "status": "Error", "error": str(e)}
+
+class WorkerPool:
+    def __init__(self, max_jobs=2, workers_per_job=6):
+        self.max_jobs = max_jobs
+        self.workers_per_job = workers_per_job
+        self.executor = None
+        # caps how many searches run at once so memory and the models aren't spread over too many jobs
+        self.job_slots = threading.BoundedSemaphore(max_jobs)
+
+    def start(self, stage_paths=(), preload=True):
+        if preload:
+            from models import preload_models
+            preload_models()
+
+        for stage_path in stage_paths:
+            load_stage(stage_path)
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_jobs * self.workers_per_job, thread_name_prefix="stage")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    # run a job's stage graph on the pool, blocks until every stage has finished or been skipped
+    def run_job(self, stages, product_name, job_id=None):
+        if self.executor is None:
+            raise RuntimeError("Worker pool has not been started.")
+
+        from stage_graph import run_graph
+
+        with self.job_slots:
+            return run_graph(stages, product_name, job_id, self.executor)
@@ -0,0 +1,76 @@
+import os
+import re
+import uuid
+
+# helpers shared by every module for locating a job's working directory
+# each analysis gets its own folder under inputs-outputs/jobs/<job_id> so several searches can run at once
+# no job id falls back to the old shared inputs-outputs folder, keeps scripts runnable by hand for debugging
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+inputs_outputs_directory = os.path.abspath(os.path.join(script_dir, "../inputs-outputs"))
+jobs_directory = os.path.join(inputs_outputs_directory, "jobs")
+# caches shared between jobs (compiled matchers, model outputs, scraped pages...)
+cache_directory = os.path.join(inputs_outputs_directory, "cache")
+# latest finished results document of each product
+results_directory = os.path.join(inputs_outputs_directory, "results")
+
+# sub-folders the google branch writes site files into
+JOB_SUBDIRECTORIES = ["scraped_texts", "sentiment_ready_texts"]
+
+# job ids end up in file paths, only allow safe characters to prevent path traversal
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def is_valid_job_id(job_id):
+    return bool(job_id) and bool(JOB_ID_PATTERN.match(job_id))
+
+def job_dir(job_id=None):
+    if not job_id:
+        return inputs_outputs_directory
+
+    if not is_valid_job_id(job_id):
+        raise ValueError(f"Invalid job id: {job_id}")
+
+    return os.path.join(jobs_directory, job_id)
+
+def job_path(job_id, *parts):
+    return os.path.join(job_dir(job_id), *parts)
+
+def cache_path(*parts):
+    path = os.path.join(cache_directory, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+# product names are free text, keep them readable but safe as file names
+def product_results_path(product_name):
+    slug = re.sub(r"[^a-z0-9]+", "-", product_name.lower()).strip("-")[:100] or "product"
+    return os.path.join(results_directory, f"{slug}.json")
+
+def create_job(job_id=None):
+    if job_id is None:
+        job_id = uuid.uuid4().hex
+
+    directory = job_dir(job_id)
+    for subdirectory in JOB_SUBDIRECTORIES:
+        os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+
+    return job_id
+
+def save_product_name(job_id, product_name):
+    with open(job_path(job_id, "product_name.txt"), "w", encoding="utf-8") as f:
+        f.write(product_name)
+
+def load_product_name(job_id):
+    with open(job_path(job_id, "product_name.txt"), "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+# most recently started job, used when the frontend doesn't send a job id
+def latest_job():
+    if not os.path.isdir(jobs_directory):
+        return None
+
+    # product name file is written once when the job starts, so its timestamp is the start time
+    job_ids = [name for name in os.listdir(jobs_directory) if is_valid_job_id(name) and os.path.isfile(job_path(name, "product_name.txt"))]
+    if not job_ids:
+        return None
+
+    return max(job_ids, key=lambda name: os.path.getmtime(job_path(name, "product_name.txt")))
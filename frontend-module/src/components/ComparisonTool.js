@@ -2,6 +2,7 @@ import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import "../styles/comparison-tool.css";
 import { motion } from "framer-motion";
+import { resultsUrl } from "./jobQuery";
 
 const ComparisonTool = () => {
   const [comparisonData, setComparisonData] = useState([]);
@@ -36,7 +37,7 @@ const ComparisonTool = () => {
   useEffect(() => {
     setComparisonData([]);
     
-    fetch("http://127.0.0.1:8000/api/results")
+    fetch(resultsUrl("comparison"))
       .then((res) => res.json())
       .then((data) => {
         if (data && data.comparison_data && data.best_features) {
@@ -5,6 +5,7 @@ import "../styles/emotion-insights.css";
 import { motion } from "framer-motion";
 
 import DataBreakdown from "./DataBreakdown";
+import { resultsUrl } from "./jobQuery";
 
 ChartJS.register(ArcElement, Tooltip, Legend);
 
@@ -15,7 +16,7 @@ const EmotionInsights = ({ darkMode, highContrast }) => {
   const chartTextColor = highContrast ? "yellow" : darkMode ? "#FFFFFF" : "#000000";
 
   useEffect(() => {
-    fetch("http://127.0.0.1:8000/api/results")
+    fetch(resultsUrl("emotions"))
       .then((response) => {
         return response.json();
       })
@@ -4,6 +4,7 @@ import { Chart, CategoryScale, LinearScale, BarElement, Title, Tooltip, Legend }
 import "../styles/feature-sentiment.css";
 import { motion } from "framer-motion";
 import DataBreakdown from "./DataBreakdown";
+import { resultsUrl } from "./jobQuery";
 
 Chart.register(CategoryScale, LinearScale, BarElement, Title, Tooltip, Legend);
 
@@ -14,7 +15,7 @@ const FeatureSentiment = ({ darkMode, highContrast }) => {
   const chartTextColor = highContrast ? "yellow" : darkMode ? "#FFFFFF" : "#000000";
 
   useEffect(() => {
-    fetch("http://localhost:8000/api/results")
+    fetch(resultsUrl("features"))
       .then((response) => response.json())
       .then((data) => setSentimentData(data))
       .catch((error) => console.error("Error:", error));
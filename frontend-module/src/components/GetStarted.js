@@ -40,21 +40,25 @@ function GetStarted({ setSearchCompleted, setSearchLoading }) {
       return;
     }
 
+    // each search gets its own job id so the backend keeps its files separate, other pages read it from storage
+    const jobId = crypto.randomUUID();
+    localStorage.setItem("jobId", jobId);
+
     setLoading(true);
     setSearchLoading(true);
-    pollProgress();
+    streamProgress(jobId);
     setProductInput("");
 
     try {
       const response = await fetch("http://127.0.0.1:8000/api/analyze", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ product: name }),
+        body: JSON.stringify({ product: name, job_id: jobId }),
       });
       if (response.ok) {
         console.log("Search completed!");
 
-        await pollResults();
+        await pollResults(jobId);
 
         setSearchCompleted(true);
       }
@@ -65,7 +69,7 @@ function GetStarted({ setSearchCompleted, setSearchLoading }) {
     setSearchLoading(false);
   };
 
-  const pollResults = async () => {
+  const pollResults = async (jobId) => {
     let attempts = 0;
     const maxAttempts = 15;
 
@@ -73,7 +77,7 @@ function GetStarted({ setSearchCompleted, setSearchLoading }) {
         await new Promise(resolve => setTimeout(resolve, 100)); // Wait 2 seconds
 
         try {
-            const response = await fetch("http://127.0.0.1:8000/api/results");
+            const response = await fetch(`http://127.0.0.1:8000/api/results?job_id=${jobId}&fields=product_name`); // only checks the document exists
             const data = await response.json();
 
             if (data.status !== "processing") {
@@ -90,35 +94,31 @@ function GetStarted({ setSearchCompleted, setSearchLoading }) {
     console.warn("Polling timed out.");
   };
 
-  const pollProgress = async () => {
-    let attempts = 0;
-    const maxAttempts = 1500;
-  
-    while (attempts < maxAttempts) {
-      await new Promise(resolve => setTimeout(resolve, 200)); // Poll every 200ms
-  
-      try {
-        const response = await fetch(`http://127.0.0.1:8000/api/progress`);
-        const data = await response.json();
-
-  
-        // Compute average progress
-        const modules = ["google", "youtube", "summary", "comparison"];
-        const total = modules.reduce((sum, mod) => sum + (data[mod] || 0), 0);
-        const percentComplete = Math.round((total / modules.length) * 0.9); // doesn't go past 90%, leave time for polling and caching
-  
-        setProgress(percentComplete);
-
-        if (data.completed) {
-          return;
-        }
+  const streamProgress = (jobId) => {
+    // one long lived connection, the backend pushes every progress change instead of being polled
+    const source = new EventSource(`http://127.0.0.1:8000/api/progress/stream?job_id=${jobId}`);
+
+    source.onmessage = (event) => {
+      const data = JSON.parse(event.data);
 
-      } catch (error) {
-        console.error("Progress polling error:", error);
+      // Compute average progress
+      const modules = ["google", "youtube", "summary", "comparison", "results"];
+      const total = modules.reduce((sum, mod) => sum + (data[mod] || 0), 0);
+      const percentComplete = Math.round(total / modules.length); // results are built by the pipeline now, 100% means they're ready
+
+      setProgress(percentComplete);
+
+      if (data.completed) {
+        source.close();
       }
-  
-      attempts++;
-    }
+    };
+
+    // browser reconnects by itself after dropped connections, only give up if the backend refused the stream
+    source.onerror = (error) => {
+      if (source.readyState === EventSource.CLOSED) {
+        console.error("Progress stream error:", error);
+      }
+    };
   };
 
   const handleInputChange = (value) => {
@@ -3,6 +3,7 @@ import { NavLink } from "react-router-dom";
 import "../styles/index.css";
 import logo from "../images/logo.png";
 import { motion, AnimatePresence } from "framer-motion";
+import { resultsUrl } from "./jobQuery";
 // import clsx from "clsx"; - switch to clsx for class management
 
 function Sidebar({ searchCompleted, searchLoading }) {
@@ -21,7 +22,7 @@ function Sidebar({ searchCompleted, searchLoading }) {
     // real-time verdict fetch
     // change out for caching logic to reduce requests and potential errors
     if (verdictOpen) {
-      fetch("http://localhost:8000/api/results") 
+      fetch(resultsUrl("tldr")) 
         .then((response) => {
           return response.json() // improve handling of GPT output - could be inconsistent
         })
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import { motion } from "framer-motion";
+import { resultsUrl } from "./jobQuery";
 // import axios from "axios";
 
 const Summarization = () => {
@@ -18,7 +19,7 @@ const Summarization = () => {
 
     const fetchSummaries = async () => {
       try {
-        const response = await fetch("http://127.0.0.1:8000/api/results");
+        const response = await fetch(resultsUrl("summaries"));
         const data = await response.json();
 
         const google = data.google_summary;
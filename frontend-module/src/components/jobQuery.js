@@ -0,0 +1,13 @@
+// job_id query for the results endpoints, left out when no job is stored (results page opened directly or storage
+// cleared) so the backend serves the latest results instead of looking for a job called "null"
+
+export const jobQuery = () => {
+  const jobId = localStorage.getItem("jobId");
+  return jobId ? `job_id=${encodeURIComponent(jobId)}` : "";
+};
+
+// one section of the stored job's results document (features, emotions, summaries, comparison, tldr)
+export const resultsUrl = (section) => {
+  const query = jobQuery();
+  return `http://127.0.0.1:8000/api/results/${section}${query ? `?${query}` : ""}`;
+};